@@ -24,11 +24,18 @@ class FlashbotsRelay:
     Reduces mempool latency and improves execution reliability.
     """
     
-    def __init__(self, web3: AsyncWeb3, private_key: str):
+    def __init__(
+        self,
+        web3: AsyncWeb3,
+        private_key: str,
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         self._web3 = web3
         self._private_key = private_key
         self._account = Account.from_key(private_key)
-        self._session: Optional[aiohttp.ClientSession] = None
+        # A caller-provided session is shared and left open on stop()
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
         
         # Flashbots endpoints
         self._relay_url = "https://relay.flashbots.net"
@@ -52,6 +59,7 @@ class FlashbotsRelay:
     async def start(self):
         """Initialize the Flashbots relay connection."""
         if self._session is None:
+            self._owns_session = True
             self._session = aiohttp.ClientSession(
                 timeout=aiohttp.ClientTimeout(total=10),
                 headers={
@@ -63,9 +71,9 @@ class FlashbotsRelay:
 
     async def stop(self):
         """Close the Flashbots relay connection."""
-        if self._session:
+        if self._session and self._owns_session:
             await self._session.close()
-            self._session = None
+        self._session = None
         logger.info("FlashbotsRelay stopped")
 
     async def submit_bundle(
@@ -237,15 +245,14 @@ class FlashbotsRelay:
                 ]
             }
             
-            # Send simulation request
-            async with aiohttp.ClientSession() as session: # Changed from self._session to aiohttp.ClientSession()
-                async with session.post(
-                    self._relay_url, # Changed from self.relay_url to self._relay_url
-                    json=simulation_request,
-                    headers={"Content-Type": "application/json"},
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    result = await response.json()
+            # Send simulation request over the pooled session
+            async with self._session.post(
+                self._relay_url,
+                json=simulation_request,
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                result = await response.json()
             
             # Parse simulation result
             if "error" in result:
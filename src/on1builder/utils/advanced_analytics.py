@@ -3,12 +3,16 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 import numpy as np
+from collections import Counter
+from collections.abc import Mapping
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Final, List, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 import logging
 
 from on1builder.config.loaders import settings
@@ -396,20 +400,95 @@ class AdvancedAnalytics:
             "total_opportunities_analyzed": len(self._historical_opportunities)
         } 
 
+# Strategy thresholds
+_GAS_THRESHOLD_HIGH: Final = 100  # gwei
+_GAS_THRESHOLD_MEDIUM: Final = 60  # gwei
+_VOLATILITY_THRESHOLD: Final = 10.0  # percentage
+_MEMPOOL_VOLUME_HIGH: Final = 1000  # transactions per minute
+
+# Count StrategySelector outcomes to re-validate the fast-path ordering
+_PROFILE_STRATEGY_BRANCHES: Final = os.environ.get("ON1BUILDER_PROFILE_STRATEGY_BRANCHES", "") == "1"
+
+# Types accepted as market condition values
+_NUMERIC_TYPES = (int, float, Decimal, np.number)
+
+def _strategy_index(mempool_tx_rate: float, gas_price_gwei: float, token_price_volatility: float) -> int:
+    """Decision index into StrategySelector._STRATEGY_TABLE for the given conditions."""
+    return (
+        (gas_price_gwei >= _GAS_THRESHOLD_HIGH) << 2
+        | (token_price_volatility >= _VOLATILITY_THRESHOLD) << 1
+        | (mempool_tx_rate >= _MEMPOOL_VOLUME_HIGH and gas_price_gwei < _GAS_THRESHOLD_MEDIUM)
+    )
+
+# Confidence adjustments indexed by (above high edge) - (below low edge):
+# 0 = within the band (or NaN), 1 = above, -1 = below.
+_GAS_CONFIDENCE_ADJ = (0.0, -0.2, 0.2)  # 30-80, > 80, < 30 gwei
+_VOLATILITY_CONFIDENCE_ADJ = (0.0, -0.2, 0.2)  # 5-15%, > 15%, < 5%
+_MEMPOOL_CONFIDENCE_ADJ = (0.0, 0.1)  # <= 500, > 500 tx/min
+
+@lru_cache(maxsize=32)
+def _banded_confidence(gas_band: int, volatility_band: int, mempool_band: int) -> float:
+    """Clipped confidence score for one combination of the 3 x 3 x 2 condition bands."""
+    confidence = (
+        0.5
+        + _GAS_CONFIDENCE_ADJ[gas_band]
+        + _VOLATILITY_CONFIDENCE_ADJ[volatility_band]
+        + _MEMPOOL_CONFIDENCE_ADJ[mempool_band]
+    )
+    return 0.0 if confidence < 0.0 else 1.0 if confidence > 1.0 else confidence
+
+def _strategy_confidence(gas_price: float, volatility: float, mempool_volume: float) -> float:
+    """Confidence score (0.0 to 1.0) of a non-skip strategy under the given conditions."""
+    return _banded_confidence(
+        int(gas_price > 80) - int(gas_price < 30),
+        int(volatility > 15.0) - int(volatility < 5.0),
+        int(mempool_volume > 500)
+    )
+
 class StrategySelector:
     """
     Dynamic strategy selector based on market conditions.
     """
     
+    # Strategy by decision index: bit 2 = gas too high, bit 1 = volatility too high,
+    # bit 0 = high mempool volume with low gas. Any risky bit means "skip".
+    _STRATEGY_TABLE = ("simple", "multi_hop", "skip", "skip", "skip", "skip", "skip", "skip")
+    _STRATEGY_LABELS = np.array(_STRATEGY_TABLE)
+    
+    # Strategies whose confidence does not depend on market conditions
+    _FIXED_STRATEGY_CONFIDENCE = {"skip": 0.0}
+    
+    __slots__ = ("logger", "_branch_hits")
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        
-        # Strategy thresholds
-        self.gas_threshold_high = 100  # gwei
-        self.gas_threshold_medium = 60  # gwei
-        self.volatility_threshold = 10.0  # percentage
-        self.mempool_volume_high = 1000  # transactions per minute
-        
+        self._branch_hits: Optional[Counter] = Counter() if _PROFILE_STRATEGY_BRANCHES else None
+    
+    @property
+    def gas_threshold_high(self) -> float:
+        """Gas price (gwei) at or above which trading is skipped."""
+        return _GAS_THRESHOLD_HIGH
+    
+    @property
+    def gas_threshold_medium(self) -> float:
+        """Gas price (gwei) below which multi-hop strategies are considered."""
+        return _GAS_THRESHOLD_MEDIUM
+    
+    @property
+    def volatility_threshold(self) -> float:
+        """Volatility (%) at or above which trading is skipped."""
+        return _VOLATILITY_THRESHOLD
+    
+    @property
+    def mempool_volume_high(self) -> float:
+        """Mempool rate (tx/min) at or above which multi-hop strategies are considered."""
+        return _MEMPOOL_VOLUME_HIGH
+    
+    @property
+    def branch_hits(self) -> Dict[str, int]:
+        """Strategy selection counts, empty unless ON1BUILDER_PROFILE_STRATEGY_BRANCHES=1."""
+        return dict(self._branch_hits or {})
+    
     def select_strategy(
         self, 
         mempool_tx_rate: float, 
@@ -427,26 +506,102 @@ class StrategySelector:
         Returns:
             Strategy: "simple", "multi_hop", or "skip"
         """
+        if not (
+            isinstance(mempool_tx_rate, _NUMERIC_TYPES)
+            and isinstance(gas_price_gwei, _NUMERIC_TYPES)
+            and isinstance(token_price_volatility, _NUMERIC_TYPES)
+        ):
+            self.logger.error(
+                "Invalid market conditions for strategy selection - Mempool: %r, Gas: %r, Volatility: %r",
+                mempool_tx_rate, gas_price_gwei, token_price_volatility
+            )
+            return "skip"  # Default to skip on invalid input
+        
         try:
-            # Check if conditions are too risky
-            if gas_price_gwei >= self.gas_threshold_high or token_price_volatility >= self.volatility_threshold:
-                self.logger.info(f"Market conditions too risky - Gas: {gas_price_gwei}gwei, Volatility: {token_price_volatility}%")
-                return "skip"
-            
-            # Check if conditions favor multi-hop strategies
-            if (mempool_tx_rate >= self.mempool_volume_high and 
-                gas_price_gwei < self.gas_threshold_medium):
-                self.logger.info(f"High mempool volume ({mempool_tx_rate} tx/min) with low gas ({gas_price_gwei}gwei) - using multi_hop")
-                return "multi_hop"
+            # Quiet markets dominate, so settle "simple" before building the decision index
+            if (
+                gas_price_gwei < _GAS_THRESHOLD_HIGH
+                and token_price_volatility < _VOLATILITY_THRESHOLD
+                and mempool_tx_rate < _MEMPOOL_VOLUME_HIGH
+            ):
+                strategy = "simple"
+            else:
+                strategy = self._STRATEGY_TABLE[
+                    _strategy_index(mempool_tx_rate, gas_price_gwei, token_price_volatility)
+                ]
+            if self._branch_hits is not None:
+                self._branch_hits[strategy] += 1
             
-            # Default to simple strategy
-            self.logger.info(f"Using simple strategy - Gas: {gas_price_gwei}gwei, Volatility: {token_price_volatility}%")
-            return "simple"
+            self.logger.info(
+                "Using %s strategy - Gas: %sgwei, Volatility: %s%%, Mempool: %s tx/min",
+                strategy, gas_price_gwei, token_price_volatility, mempool_tx_rate
+            )
+            return strategy
             
         except Exception as e:
             self.logger.error(f"Error selecting strategy: {e}")
             return "skip"  # Default to skip on error
     
+    def select_strategy_batch(
+        self,
+        mempool_tx_rates: Any,
+        gas_prices_gwei: Any,
+        token_price_volatilities: Any
+    ) -> np.ndarray:
+        """
+        Vectorized select_strategy over many market snapshots at once.
+        
+        Args:
+            mempool_tx_rates: Transactions per minute in mempool
+            gas_prices_gwei: Gas prices in gwei
+            token_price_volatilities: Token price volatility percentages
+            
+        Returns:
+            Array of strategies: "simple", "multi_hop", or "skip"
+        """
+        mempool = np.asarray(mempool_tx_rates, dtype=np.float64)
+        gas = np.asarray(gas_prices_gwei, dtype=np.float64)
+        volatility = np.asarray(token_price_volatilities, dtype=np.float64)
+        
+        # Pack the predicate masks as uint8 bits so no int64 temporaries are built
+        idx = (
+            (gas >= _GAS_THRESHOLD_HIGH).view(np.uint8) << 2
+            | (volatility >= _VOLATILITY_THRESHOLD).view(np.uint8) << 1
+            | ((mempool >= _MEMPOOL_VOLUME_HIGH) & (gas < _GAS_THRESHOLD_MEDIUM)).view(np.uint8)
+        )
+        return self._STRATEGY_LABELS.take(idx)
+    
+    def evaluate(
+        self,
+        mempool_tx_rate: float,
+        gas_price_gwei: float,
+        token_price_volatility: float
+    ) -> Tuple[str, float]:
+        """
+        Select a strategy and score its confidence in one call.
+        
+        Equivalent to select_strategy followed by get_strategy_confidence on the
+        same conditions, without building a market conditions dict in between.
+        
+        Args:
+            mempool_tx_rate: Transactions per minute in mempool
+            gas_price_gwei: Current gas price in gwei
+            token_price_volatility: Token price volatility percentage
+            
+        Returns:
+            Tuple of (strategy, confidence score)
+        """
+        strategy = self.select_strategy(mempool_tx_rate, gas_price_gwei, token_price_volatility)
+        try:
+            fixed_confidence = self._FIXED_STRATEGY_CONFIDENCE.get(strategy)
+            if fixed_confidence is not None:
+                return strategy, fixed_confidence
+            return strategy, _strategy_confidence(gas_price_gwei, token_price_volatility, mempool_tx_rate)
+            
+        except Exception as e:
+            self.logger.error(f"Error calculating strategy confidence: {e}")
+            return strategy, 0.0
+    
     def get_strategy_confidence(self, strategy: str, market_conditions: dict) -> float:
         """
         Calculate confidence score for selected strategy.
@@ -459,34 +614,22 @@ class StrategySelector:
             Confidence score (0.0 to 1.0)
         """
         try:
-            if strategy == "skip":
-                return 0.0
+            fixed_confidence = self._FIXED_STRATEGY_CONFIDENCE.get(strategy)
+            if fixed_confidence is not None:
+                return fixed_confidence
             # If no market conditions, return base confidence
             if not market_conditions:
                 return 0.5
-            # Base confidence
-            confidence = 0.5
-            
-            # Adjust based on gas price
-            gas_price = market_conditions.get('gas_price_gwei', 0)
-            if gas_price < 30:
-                confidence += 0.2
-            elif gas_price > 80:
-                confidence -= 0.2
-            
-            # Adjust based on volatility
-            volatility = market_conditions.get('token_price_volatility', 0)
-            if volatility < 5.0:
-                confidence += 0.2
-            elif volatility > 15.0:
-                confidence -= 0.2
-            
-            # Adjust based on mempool volume
-            mempool_volume = market_conditions.get('mempool_tx_rate', 0)
-            if mempool_volume > 500:
-                confidence += 0.1
+            if not isinstance(market_conditions, Mapping):
+                self.logger.error("Invalid market conditions for strategy confidence: %r", market_conditions)
+                return 0.0
             
-            return max(0.0, min(1.0, confidence))
+            get = market_conditions.get
+            return _strategy_confidence(
+                get('gas_price_gwei', 0),
+                get('token_price_volatility', 0),
+                get('mempool_tx_rate', 0)
+            )
             
         except Exception as e:
             self.logger.error(f"Error calculating strategy confidence: {e}")
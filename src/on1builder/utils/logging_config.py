@@ -1,4 +1,5 @@
 # src/on1builder/utils/logging_config.py
+import json
 import logging
 import sys
 from pathlib import Path
@@ -12,11 +13,17 @@ try:
 except ImportError:
     HAVE_COLORLOG = False
 
+# Use orjson for JSON log lines if available
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
 _loggers = {}
 class JsonFormatter(logging.Formatter):
     """Formats log records as JSON strings for structured logging."""
     def format(self, record: logging.LogRecord) -> str:
-        import json
         log_entry = {
             "timestamp": self.formatTime(record, self.datefmt),
             "level": record.levelname,
@@ -29,8 +36,10 @@ class JsonFormatter(logging.Formatter):
         # Add extra context if available
         if hasattr(record, 'extra_data'):
             log_entry.update(record.extra_data)
-            
-        return json.dumps(log_entry)
+        
+        if HAVE_ORJSON:
+            return orjson.dumps(log_entry, default=str).decode()
+        return json.dumps(log_entry, default=str)
 
 def setup_logging():
     """
@@ -2,11 +2,16 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import logging
 import time
+from collections import OrderedDict, deque
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Final, List, NamedTuple, Optional, Tuple, TypedDict
 from dataclasses import dataclass
+from functools import lru_cache
 
+import numpy as np
 from web3 import AsyncWeb3
 from web3.types import TxParams
 
@@ -16,7 +21,186 @@ from on1builder.utils.custom_exceptions import InsufficientProfitError
 
 logger = get_logger(__name__)
 
-@dataclass
+# Risk scoring tiers: net profit / ROI edges and the risk points for each bucket.
+_PROFIT_TIERS = np.array([0.005, 0.01, 0.02])
+_PROFIT_SCORES = np.array([3, 2, 1, 0])
+_ROI_TIERS = np.array([5.0, 10.0])
+_ROI_SCORES = np.array([2, 1, 0])
+_RISK_LEVELS = ("low", "low", "low", "medium", "medium", "high", "high", "high")
+
+# Confidence scoring: state indices into the precomputed confidence table.
+_CONFIDENCE_PROFIT_TIERS = np.array([0.005, 0.01])
+_MARKET_STATES = {"stable": 1, "volatile": 2}
+_OPPORTUNITY_STATES = {"arbitrage": 1, "flashloan_arbitrage": 1, "sandwich": 2, "front_run": 2}
+
+
+def _build_confidence_table() -> np.ndarray:
+    """Precompute clipped confidence for every (simulation, profit, market, type) state."""
+    simulation_adj = np.array([0.0, 0.2])
+    profit_adj = np.array([0.0, 0.1, 0.15])
+    market_adj = np.array([0.0, 0.1, -0.1])
+    opportunity_adj = np.array([0.0, 0.05, -0.1])
+    table = np.add.outer(
+        np.add.outer(np.add.outer(0.5 + simulation_adj, profit_adj), market_adj),
+        opportunity_adj,
+    )
+    return np.clip(table, 0.1, 1.0)
+
+
+_CONFIDENCE_TABLE = _build_confidence_table()
+
+# Identical simulations within one block (~12s) share a single eth_call.
+_SIMULATION_TTL_SECONDS = 12.0
+
+# Analysis completion is logged as one summary per window instead of per call.
+_LOG_SUMMARY_INTERVAL_SECONDS = 1.0
+
+# Gas price strategies tried for unprofitable opportunities, as multiples of the current price.
+_GAS_STRATEGY_NAMES = ("aggressive", "conservative", "market", "premium")
+_GAS_STRATEGY_MULTIPLIERS = np.array([0.8, 0.9, 1.0, 1.1])
+
+
+def _score(
+    gross_profit: Any,
+    gas_estimate: Any,
+    gas_price_gwei: Any,
+    min_profit_eth: float,
+    min_roi_percentage: float,
+    amount_in: Any
+) -> Tuple[Any, Any, Any, Any]:
+    """
+    Fused gas cost, net profit, ROI and profitability check.
+    
+    Accepts Python scalars or NumPy arrays interchangeably; ROI is 0 when amount_in <= 0.
+    """
+    gas_cost = gas_estimate * gas_price_gwei * 1e-9
+    net_profit = gross_profit - gas_cost
+    roi_percentage = net_profit / np.where(amount_in > 0, amount_in, np.inf) * 100.0
+    profitable = (net_profit >= min_profit_eth) & (roi_percentage >= min_roi_percentage)
+    return gas_cost, net_profit, roi_percentage, profitable
+
+@lru_cache(maxsize=256)
+def _confidence_for_state(sim_state: int, profit_tier: int, market_state: int, opportunity_state: int) -> float:
+    """Confidence table entry for a bucketed state, as a Python float."""
+    return float(_CONFIDENCE_TABLE[sim_state, profit_tier, market_state, opportunity_state])
+
+@lru_cache(maxsize=256)
+def _risk_for_buckets(profit_bucket: int, roi_bucket: int, simulation_success: bool) -> str:
+    """Risk level for bucketed net profit and ROI."""
+    return _RISK_LEVELS[_PROFIT_SCORES[profit_bucket] + _ROI_SCORES[roi_bucket] + (0 if simulation_success else 2)]
+
+def calculate_profit_confidence(
+    opportunity_type: str,
+    market_conditions: str,
+    simulation_success: bool,
+    net_profit: float
+) -> float:
+    """Calculate confidence score for profit prediction."""
+    try:
+        return _confidence_for_state(
+            1 if simulation_success else 0,
+            int(np.count_nonzero(_CONFIDENCE_PROFIT_TIERS < net_profit)),
+            _MARKET_STATES.get(market_conditions, 0),
+            _OPPORTUNITY_STATES.get(opportunity_type, 0),
+        )
+        
+    except Exception as e:
+        logger.error(f"Error calculating profit confidence: {e}")
+        return 0.5
+
+def assess_profit_risk(net_profit: float, roi_percentage: float, simulation_success: bool) -> str:
+    """Assess risk level of profit opportunity."""
+    try:
+        return _risk_for_buckets(
+            int(np.searchsorted(_PROFIT_TIERS, net_profit, side="right")),
+            int(np.searchsorted(_ROI_TIERS, roi_percentage, side="right")),
+            bool(simulation_success)
+        )
+            
+    except Exception as e:
+        logger.error(f"Error assessing profit risk: {e}")
+        return "high"
+
+def is_profitable_trade(
+    input_amt: float, 
+    output_amt: float, 
+    gas_cost_eth: float, 
+    roi_threshold_pct: float = 5.0
+) -> bool:
+    """
+    Determine if a trade is profitable based on ROI threshold.
+    
+    Args:
+        input_amt: Input amount in ETH
+        output_amt: Output amount in ETH
+        gas_cost_eth: Gas cost in ETH
+        roi_threshold_pct: Minimum ROI percentage required
+        
+    Returns:
+        True if ROI >= threshold, False otherwise
+    """
+    try:
+        if input_amt <= 0:
+            return False
+        
+        # Calculate net profit after gas costs
+        net_profit = output_amt - input_amt - gas_cost_eth
+        
+        # ROI >= threshold, cross-multiplied by the (positive) input to avoid the divide
+        is_profitable = net_profit * 100 >= roi_threshold_pct * input_amt
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Trade ROI: %.2f%% (threshold: %s%%) - Profitable: %s",
+                net_profit / input_amt * 100, roi_threshold_pct, is_profitable
+            )
+        
+        return is_profitable
+        
+    except Exception as e:
+        logger.error(f"Error calculating trade profitability: {e}")
+        return False
+
+def are_profitable_trades(
+    input_amts: Any, 
+    output_amts: Any, 
+    gas_costs_eth: Any, 
+    roi_threshold_pct: float = 5.0
+) -> np.ndarray:
+    """
+    Vectorized is_profitable_trade over many candidate trades at once.
+    
+    Args:
+        input_amts: Input amounts in ETH
+        output_amts: Output amounts in ETH
+        gas_costs_eth: Gas costs in ETH
+        roi_threshold_pct: Minimum ROI percentage required
+        
+    Returns:
+        Boolean array, True where ROI >= threshold; trades with input <= 0 are never profitable
+    """
+    inputs = np.asarray(input_amts, dtype=np.float64)
+    outputs = np.asarray(output_amts, dtype=np.float64)
+    gas_costs = np.asarray(gas_costs_eth, dtype=np.float64)
+    
+    net_profits = outputs - inputs - gas_costs
+    return (inputs > 0) & (net_profits * 100 >= roi_threshold_pct * inputs)
+
+def _simulation_key(tx_params: TxParams) -> bytes:
+    """Hash the fields that determine an eth_call result into a compact cache key."""
+    fields = (
+        tx_params.get("to"), tx_params.get("from"), tx_params.get("data"),
+        tx_params.get("value", 0), tx_params.get("gas")
+    )
+    return hashlib.blake2b(repr(fields).encode(), digest_size=16).digest()
+
+class Opportunity(TypedDict, total=False):
+    """Opportunity fields read by the profit optimizer; producers write plain floats."""
+    type: str
+    expected_profit_eth: float
+    amount_in: float
+
+@dataclass(frozen=True, slots=True)
 class ProfitAnalysis:
     """Comprehensive profit analysis for a transaction."""
     gross_profit_eth: float
@@ -30,6 +214,54 @@ class ProfitAnalysis:
     simulation_success: bool
     execution_probability: float
 
+# Shared result for every error path; ProfitAnalysis is frozen so it is safe to reuse.
+_ZERO_PROFIT_ANALYSIS: Final[ProfitAnalysis] = ProfitAnalysis(
+    gross_profit_eth=0.0,
+    gas_cost_eth=0.0,
+    net_profit_eth=0.0,
+    roi_percentage=0.0,
+    profitable=False,
+    confidence_score=0.0,
+    risk_level="high",
+    recommended_gas_price_gwei=0,
+    simulation_success=False,
+    execution_probability=0.0
+)
+
+class SimResult(NamedTuple):
+    """Outcome of simulating a transaction."""
+    success: bool
+    gas_estimate: int
+    simulation_result: Any
+    execution_probability: float
+
+class GasAnalysis(NamedTuple):
+    """Current and optimized gas pricing for a transaction."""
+    current_gas_price_gwei: float
+    optimized_gas_price_gwei: float
+    gas_estimate: int
+    current_gas_cost_eth: float
+    optimized_gas_cost_eth: float
+    gas_savings_eth: float
+    market_conditions: str
+
+class ProfitCalc(NamedTuple):
+    """Profitability metrics at the optimized gas price."""
+    gross_profit_eth: float
+    gas_cost_eth: float
+    net_profit_eth: float
+    roi_percentage: float
+    profitable: bool
+    confidence_score: float
+    risk_level: str
+    execution_probability: float
+
+class GasOptimization(NamedTuple):
+    """Recommended gas price after optimization."""
+    recommended_gas_price_gwei: int
+    gas_optimization_strategy: str
+    potential_savings_eth: float
+
 class ProfitOptimizer:
     """
     Advanced profit optimization with simulation, gas optimization, and profitability analysis.
@@ -41,6 +273,7 @@ class ProfitOptimizer:
         self._min_roi_percentage = 5.0  # Minimum 5% ROI
         self._min_profit_eth = settings.min_profit_eth
         self._max_gas_fee_percentage = settings.max_gas_fee_percentage
+        self._default_gas_limit = settings.default_gas_limit
         
         # Performance tracking
         self._optimization_stats = {
@@ -53,14 +286,23 @@ class ProfitOptimizer:
         }
         
         # Gas price history for optimization
-        self._gas_price_history: List[Tuple[int, float]] = []
         self._max_history_size = 1000
+        self._gas_price_history: deque[Tuple[int, float]] = deque(maxlen=self._max_history_size)
+        
+        # In-flight / recent simulations keyed by transaction, oldest start time first
+        self._sim_inflight: OrderedDict[bytes, Tuple[float, asyncio.Future]] = OrderedDict()
+        
+        # Rate-limited analysis logging: counts accumulated since the last summary
+        self._log_last_ts = time.monotonic()
+        self._log_window_analyses = 0
+        self._log_window_profitable = 0
+        self._log_window_elapsed_ns = 0
         
         logger.info("ProfitOptimizer initialized")
 
     async def analyze_profitability(
         self, 
-        opportunity: Dict[str, Any], 
+        opportunity: Opportunity, 
         tx_params: TxParams
     ) -> ProfitAnalysis:
         """
@@ -74,7 +316,7 @@ class ProfitOptimizer:
             Profit analysis result
         """
         try:
-            start_time = time.time()
+            t0 = time.monotonic_ns()
             
             # 1. Simulate transaction
             simulation_result = await self._simulate_transaction(tx_params)
@@ -100,55 +342,195 @@ class ProfitOptimizer:
             if final_analysis.profitable:
                 self._optimization_stats["profitable_opportunities"] += 1
             
-            analysis_time = (time.time() - start_time) * 1000
-            logger.info(f"Profit analysis completed in {analysis_time:.1f}ms - Profitable: {final_analysis.profitable}")
+            self._log_analysis_summary(1, int(final_analysis.profitable), time.monotonic_ns() - t0)
             
             return final_analysis
             
         except Exception as e:
             logger.error(f"Error in profitability analysis: {e}")
-            return ProfitAnalysis(
-                gross_profit_eth=0.0,
-                gas_cost_eth=0.0,
-                net_profit_eth=0.0,
-                roi_percentage=0.0,
-                profitable=False,
-                confidence_score=0.0,
-                risk_level="high",
-                recommended_gas_price_gwei=0,
-                simulation_success=False,
-                execution_probability=0.0
+            return _ZERO_PROFIT_ANALYSIS
+
+    async def analyze_profitability_many(
+        self,
+        opportunities: List[Tuple[Opportunity, TxParams]]
+    ) -> List[ProfitAnalysis]:
+        """
+        Batched profitability analysis for several opportunities in the same block.
+        
+        The gas price and every eth_call/estimate_gas are sent as a single JSON-RPC
+        batch, and the profitability math runs vectorized over all opportunities.
+        
+        Args:
+            opportunities: (opportunity, tx_params) pairs
+            
+        Returns:
+            Profit analysis results, in input order
+        """
+        if not opportunities:
+            return []
+        
+        try:
+            t0 = time.monotonic_ns()
+            
+            # 1. Simulate all transactions and fetch the gas price in one round-trip
+            simulation_results, current_gas_price = await self._simulate_transactions_batch(
+                [tx_params for _, tx_params in opportunities]
+            )
+            
+            # 2. Gas market analysis shared by every opportunity
+            current_gas_price_gwei = float(self._web3.from_wei(current_gas_price, "gwei"))
+            optimized_gas_price_gwei = await self._calculate_optimal_gas_price(current_gas_price_gwei, 0)
+            self._update_gas_price_history(current_gas_price_gwei)
+            market_conditions = await self._assess_gas_market_conditions()
+            
+            # 3. Vectorized profitability for all opportunities
+            gas_estimates = np.array([sim.gas_estimate for sim in simulation_results], dtype=np.float64)
+            gross_profits = np.array(
+                [opp.get("expected_profit_eth") or 0.0 for opp, _ in opportunities], dtype=np.float64
             )
+            amounts_in = np.array(
+                [opp.get("amount_in", 1.0) for opp, _ in opportunities], dtype=np.float64
+            )
+            current_gas_costs = gas_estimates * current_gas_price_gwei * 1e-9
+            gas_costs, net_profits, roi_percentages, profitable = _score(
+                gross_profits, gas_estimates, optimized_gas_price_gwei,
+                self._min_profit_eth, self._min_roi_percentage, amounts_in
+            )
+            
+            # 4-5. Gas optimization and final check per opportunity
+            results = []
+            for i, (opportunity, _) in enumerate(opportunities):
+                simulation_result = simulation_results[i]
+                net_profit = float(net_profits[i])
+                roi_percentage = float(roi_percentages[i])
+                gas_analysis = GasAnalysis(
+                    current_gas_price_gwei=current_gas_price_gwei,
+                    optimized_gas_price_gwei=optimized_gas_price_gwei,
+                    gas_estimate=simulation_result.gas_estimate,
+                    current_gas_cost_eth=float(current_gas_costs[i]),
+                    optimized_gas_cost_eth=float(gas_costs[i]),
+                    gas_savings_eth=float(current_gas_costs[i] - gas_costs[i]),
+                    market_conditions=market_conditions
+                )
+                profit_analysis = ProfitCalc(
+                    gross_profit_eth=float(gross_profits[i]),
+                    gas_cost_eth=float(gas_costs[i]),
+                    net_profit_eth=net_profit,
+                    roi_percentage=roi_percentage,
+                    profitable=bool(profitable[i]) and simulation_result.success,
+                    confidence_score=self._calculate_profit_confidence(
+                        opportunity, gas_analysis, simulation_result, net_profit
+                    ),
+                    risk_level=self._assess_profit_risk(net_profit, roi_percentage, simulation_result),
+                    execution_probability=simulation_result.execution_probability
+                )
+                optimized_gas = await self._optimize_gas_price(profit_analysis, gas_analysis)
+                results.append(
+                    await self._finalize_profit_analysis(profit_analysis, optimized_gas, simulation_result)
+                )
+            
+            # Update statistics
+            self._optimization_stats["total_analyses"] += len(results)
+            self._optimization_stats["profitable_opportunities"] += sum(r.profitable for r in results)
+            
+            self._log_analysis_summary(
+                len(results), sum(r.profitable for r in results), time.monotonic_ns() - t0
+            )
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in batched profitability analysis: {e}")
+            return [_ZERO_PROFIT_ANALYSIS] * len(opportunities)
+
+    async def _simulate_transaction(self, tx_params: TxParams) -> SimResult:
+        """Simulate transaction, sharing one in-flight simulation between identical calls."""
+        key = _simulation_key(tx_params)
+        now = time.monotonic()
+        entry = self._sim_inflight.get(key)
+        
+        if entry is None or now - entry[0] >= _SIMULATION_TTL_SECONDS:
+            # Entries are inserted in start order, so expired ones are all at the front
+            inflight = self._sim_inflight
+            while inflight and now - next(iter(inflight.values()))[0] >= _SIMULATION_TTL_SECONDS:
+                inflight.popitem(last=False)
+            future = asyncio.ensure_future(self._execute_simulation(tx_params))
+            future.add_done_callback(lambda f: self._forget_failed_simulation(key, f))
+            entry = (now, future)
+            inflight[key] = entry
+            inflight.move_to_end(key)
+        
+        # Shield so a cancelled caller does not cancel the simulation other callers await
+        return await asyncio.shield(entry[1])
+
+    def _forget_failed_simulation(self, key: bytes, future: asyncio.Future) -> None:
+        """Stop sharing a failed simulation once its current waiters have it."""
+        if future.cancelled() or future.exception() is not None or not future.result().success:
+            entry = self._sim_inflight.get(key)
+            if entry is not None and entry[1] is future:
+                del self._sim_inflight[key]
 
-    async def _simulate_transaction(self, tx_params: TxParams) -> Dict[str, Any]:
+    async def _execute_simulation(self, tx_params: TxParams) -> SimResult:
         """Simulate transaction to estimate gas usage and success probability."""
         try:
-            # Use eth_call to simulate transaction
-            simulation_result = await self._web3.eth.call(tx_params)
-            
-            # Estimate gas usage
-            gas_estimate = await self._web3.eth.estimate_gas(tx_params)
+            # Simulate with eth_call and estimate gas usage concurrently
+            simulation_result, gas_estimate = await asyncio.gather(
+                self._web3.eth.call(tx_params),
+                self._web3.eth.estimate_gas(tx_params)
+            )
             
             # Check if simulation was successful
             simulation_success = simulation_result is not None
             
-            return {
-                "success": simulation_success,
-                "gas_estimate": gas_estimate,
-                "simulation_result": simulation_result,
-                "execution_probability": 0.9 if simulation_success else 0.1
-            }
+            return SimResult(
+                success=simulation_success,
+                gas_estimate=gas_estimate,
+                simulation_result=simulation_result,
+                execution_probability=0.9 if simulation_success else 0.1
+            )
             
         except Exception as e:
             logger.warning(f"Transaction simulation failed: {e}")
-            return {
-                "success": False,
-                "gas_estimate": tx_params.get("gas", settings.default_gas_limit),
-                "simulation_result": None,
-                "execution_probability": 0.3
-            }
+            return SimResult(
+                success=False,
+                gas_estimate=tx_params.get("gas", self._default_gas_limit),
+                simulation_result=None,
+                execution_probability=0.3
+            )
 
-    async def _analyze_gas_costs(self, tx_params: TxParams, simulation_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _simulate_transactions_batch(
+        self,
+        tx_params_list: List[TxParams]
+    ) -> Tuple[List[SimResult], int]:
+        """Simulate transactions and fetch the gas price as a single JSON-RPC batch."""
+        try:
+            async with self._web3.batch_requests() as batch:
+                batch.add(self._web3.eth.gas_price)
+                for tx_params in tx_params_list:
+                    batch.add(self._web3.eth.call(tx_params))
+                    batch.add(self._web3.eth.estimate_gas(tx_params))
+                responses = await batch.async_execute()
+                
+        except Exception as e:
+            # A single reverting call fails the whole batch; simulate individually instead
+            logger.warning(f"Batched simulation failed, falling back to individual calls: {e}")
+            simulation_results = await asyncio.gather(
+                *(self._simulate_transaction(tx_params) for tx_params in tx_params_list)
+            )
+            return list(simulation_results), await self._web3.eth.gas_price
+        
+        simulation_results = []
+        for simulation_result, gas_estimate in zip(responses[1::2], responses[2::2]):
+            simulation_success = simulation_result is not None
+            simulation_results.append(SimResult(
+                success=simulation_success,
+                gas_estimate=gas_estimate,
+                simulation_result=simulation_result,
+                execution_probability=0.9 if simulation_success else 0.1
+            ))
+        return simulation_results, responses[0]
+
+    async def _analyze_gas_costs(self, tx_params: TxParams, simulation_result: SimResult) -> GasAnalysis:
         """Analyze gas costs and optimize gas pricing."""
         try:
             # Get current gas price
@@ -156,7 +538,7 @@ class ProfitOptimizer:
             current_gas_price_gwei = float(self._web3.from_wei(current_gas_price, "gwei"))
             
             # Estimate gas usage
-            gas_estimate = simulation_result.get("gas_estimate", settings.default_gas_limit)
+            gas_estimate = simulation_result.gas_estimate
             
             # Calculate gas costs with current price
             gas_cost_wei = gas_estimate * current_gas_price
@@ -175,55 +557,52 @@ class ProfitOptimizer:
             # Update gas price history
             self._update_gas_price_history(current_gas_price_gwei)
             
-            return {
-                "current_gas_price_gwei": current_gas_price_gwei,
-                "optimized_gas_price_gwei": optimized_gas_price_gwei,
-                "gas_estimate": gas_estimate,
-                "current_gas_cost_eth": gas_cost_eth,
-                "optimized_gas_cost_eth": optimized_gas_cost_eth,
-                "gas_savings_eth": gas_cost_eth - optimized_gas_cost_eth,
-                "market_conditions": await self._assess_gas_market_conditions()
-            }
+            return GasAnalysis(
+                current_gas_price_gwei=current_gas_price_gwei,
+                optimized_gas_price_gwei=optimized_gas_price_gwei,
+                gas_estimate=gas_estimate,
+                current_gas_cost_eth=gas_cost_eth,
+                optimized_gas_cost_eth=optimized_gas_cost_eth,
+                gas_savings_eth=gas_cost_eth - optimized_gas_cost_eth,
+                market_conditions=await self._assess_gas_market_conditions()
+            )
             
         except Exception as e:
             logger.error(f"Error analyzing gas costs: {e}")
-            return {
-                "current_gas_price_gwei": 50,
-                "optimized_gas_price_gwei": 50,
-                "gas_estimate": settings.default_gas_limit,
-                "current_gas_cost_eth": 0.02,
-                "optimized_gas_cost_eth": 0.02,
-                "gas_savings_eth": 0.0,
-                "market_conditions": "unknown"
-            }
+            return GasAnalysis(
+                current_gas_price_gwei=50,
+                optimized_gas_price_gwei=50,
+                gas_estimate=self._default_gas_limit,
+                current_gas_cost_eth=0.02,
+                optimized_gas_cost_eth=0.02,
+                gas_savings_eth=0.0,
+                market_conditions="unknown"
+            )
 
     async def _calculate_profitability(
         self, 
-        opportunity: Dict[str, Any], 
-        gas_analysis: Dict[str, Any], 
-        simulation_result: Dict[str, Any]
-    ) -> Dict[str, Any]:
+        opportunity: Opportunity, 
+        gas_analysis: GasAnalysis, 
+        simulation_result: SimResult
+    ) -> ProfitCalc:
         """Calculate profitability metrics."""
         try:
             # Extract opportunity data
-            expected_profit = float(opportunity.get("expected_profit_eth", 0))
-            amount_in = float(opportunity.get("amount_in", 1.0))
-            
-            # Use optimized gas cost
-            gas_cost = gas_analysis["optimized_gas_cost_eth"]
-            
-            # Calculate net profit
-            net_profit = expected_profit - gas_cost
-            
-            # Calculate ROI
-            roi_percentage = (net_profit / amount_in) * 100 if amount_in > 0 else 0
-            
-            # Determine if profitable
-            profitable = (
-                net_profit >= self._min_profit_eth and 
-                roi_percentage >= self._min_roi_percentage and
-                simulation_result["success"]
+            expected_profit = opportunity.get("expected_profit_eth") or 0.0
+            amount_in = opportunity.get("amount_in", 1.0)
+            
+            # Gas cost, net profit, ROI and profitability at the optimized gas price
+            gas_cost, net_profit, roi_percentage, profitable = _score(
+                expected_profit,
+                gas_analysis.gas_estimate,
+                gas_analysis.optimized_gas_price_gwei,
+                self._min_profit_eth,
+                self._min_roi_percentage,
+                amount_in
             )
+            net_profit = float(net_profit)
+            roi_percentage = float(roi_percentage)
+            profitable = bool(profitable) and simulation_result.success
             
             # Calculate confidence score
             confidence_score = self._calculate_profit_confidence(
@@ -233,137 +612,110 @@ class ProfitOptimizer:
             # Assess risk level
             risk_level = self._assess_profit_risk(net_profit, roi_percentage, simulation_result)
             
-            return {
-                "gross_profit_eth": expected_profit,
-                "gas_cost_eth": gas_cost,
-                "net_profit_eth": net_profit,
-                "roi_percentage": roi_percentage,
-                "profitable": profitable,
-                "confidence_score": confidence_score,
-                "risk_level": risk_level,
-                "execution_probability": simulation_result["execution_probability"]
-            }
+            return ProfitCalc(
+                gross_profit_eth=expected_profit,
+                gas_cost_eth=float(gas_cost),
+                net_profit_eth=net_profit,
+                roi_percentage=roi_percentage,
+                profitable=profitable,
+                confidence_score=confidence_score,
+                risk_level=risk_level,
+                execution_probability=simulation_result.execution_probability
+            )
             
         except Exception as e:
             logger.error(f"Error calculating profitability: {e}")
-            return {
-                "gross_profit_eth": 0.0,
-                "gas_cost_eth": 0.0,
-                "net_profit_eth": 0.0,
-                "roi_percentage": 0.0,
-                "profitable": False,
-                "confidence_score": 0.0,
-                "risk_level": "high",
-                "execution_probability": 0.0
-            }
+            return ProfitCalc(
+                gross_profit_eth=0.0,
+                gas_cost_eth=0.0,
+                net_profit_eth=0.0,
+                roi_percentage=0.0,
+                profitable=False,
+                confidence_score=0.0,
+                risk_level="high",
+                execution_probability=0.0
+            )
 
-    async def _optimize_gas_price(self, profit_analysis: Dict[str, Any], gas_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    async def _optimize_gas_price(self, profit_analysis: ProfitCalc, gas_analysis: GasAnalysis) -> GasOptimization:
         """Optimize gas price for maximum profitability."""
         try:
-            current_gas_price = gas_analysis["current_gas_price_gwei"]
-            optimized_gas_price = gas_analysis["optimized_gas_price_gwei"]
+            current_gas_price = gas_analysis.current_gas_price_gwei
+            optimized_gas_price = gas_analysis.optimized_gas_price_gwei
             
             # If not profitable, try to reduce gas price further
-            if not profit_analysis["profitable"]:
-                # Try different gas price strategies
-                strategies = [
-                    ("aggressive", current_gas_price * 0.8),
-                    ("conservative", current_gas_price * 0.9),
-                    ("market", current_gas_price),
-                    ("premium", current_gas_price * 1.1)
-                ]
-                
-                best_strategy = None
-                best_profit = profit_analysis["net_profit_eth"]
+            if not profit_analysis.profitable:
+                # Score every gas price strategy in one pass
+                strategy_prices = current_gas_price * _GAS_STRATEGY_MULTIPLIERS
+                net_profits = _score(
+                    profit_analysis.gross_profit_eth,
+                    gas_analysis.gas_estimate,
+                    strategy_prices,
+                    self._min_profit_eth,
+                    self._min_roi_percentage,
+                    1.0
+                )[1]
+                best = int(np.argmax(net_profits))
                 
-                for strategy_name, gas_price in strategies:
-                    # Recalculate profit with new gas price
-                    gas_cost_wei = gas_analysis["gas_estimate"] * self._web3.to_wei(gas_price, "gwei")
-                    gas_cost_eth = float(self._web3.from_wei(gas_cost_wei, "ether"))
-                    net_profit = profit_analysis["gross_profit_eth"] - gas_cost_eth
-                    
-                    if net_profit > best_profit:
-                        best_profit = net_profit
-                        best_strategy = (strategy_name, gas_price)
-                
-                if best_strategy:
-                    optimized_gas_price = best_strategy[1]
-                    logger.info(f"Optimized gas price: {optimized_gas_price:.1f} Gwei ({best_strategy[0]} strategy)")
-            
-            return {
-                "recommended_gas_price_gwei": int(optimized_gas_price),
-                "gas_optimization_strategy": "dynamic",
-                "potential_savings_eth": gas_analysis["gas_savings_eth"]
-            }
+                if net_profits[best] > profit_analysis.net_profit_eth:
+                    optimized_gas_price = float(strategy_prices[best])
+                    logger.info(f"Optimized gas price: {optimized_gas_price:.1f} Gwei ({_GAS_STRATEGY_NAMES[best]} strategy)")
+            
+            return GasOptimization(
+                recommended_gas_price_gwei=int(optimized_gas_price),
+                gas_optimization_strategy="dynamic",
+                potential_savings_eth=gas_analysis.gas_savings_eth
+            )
             
         except Exception as e:
             logger.error(f"Error optimizing gas price: {e}")
-            return {
-                "recommended_gas_price_gwei": int(gas_analysis["current_gas_price_gwei"]),
-                "gas_optimization_strategy": "fallback",
-                "potential_savings_eth": 0.0
-            }
+            return GasOptimization(
+                recommended_gas_price_gwei=int(gas_analysis.current_gas_price_gwei),
+                gas_optimization_strategy="fallback",
+                potential_savings_eth=0.0
+            )
 
     async def _finalize_profit_analysis(
         self, 
-        profit_analysis: Dict[str, Any], 
-        gas_optimization: Dict[str, Any], 
-        simulation_result: Dict[str, Any]
+        profit_analysis: ProfitCalc, 
+        gas_optimization: GasOptimization, 
+        simulation_result: SimResult
     ) -> ProfitAnalysis:
         """Create final profit analysis result."""
         try:
-            # Recalculate with optimized gas price
-            optimized_gas_cost_wei = (
-                profit_analysis["gas_cost_eth"] * 10**18 * 
-                gas_optimization["recommended_gas_price_gwei"] / 
-                (profit_analysis["gas_cost_eth"] * 10**18 / profit_analysis["gas_cost_eth"])
-            )
-            optimized_gas_cost_eth = float(self._web3.from_wei(int(optimized_gas_cost_wei), "ether"))
-            
-            final_net_profit = profit_analysis["gross_profit_eth"] - optimized_gas_cost_eth
-            final_roi = (final_net_profit / 1.0) * 100  # Assuming 1 ETH investment
-            
-            # Final profitability check
-            final_profitable = (
-                final_net_profit >= self._min_profit_eth and
-                final_roi >= self._min_roi_percentage and
-                simulation_result["success"]
+            # Recalculate with the recommended gas price (assuming 1 ETH investment)
+            optimized_gas_cost_eth, final_net_profit, final_roi, final_profitable = _score(
+                profit_analysis.gross_profit_eth,
+                simulation_result.gas_estimate,
+                gas_optimization.recommended_gas_price_gwei,
+                self._min_profit_eth,
+                self._min_roi_percentage,
+                1.0
             )
+            final_profitable = bool(final_profitable) and simulation_result.success
             
             return ProfitAnalysis(
-                gross_profit_eth=profit_analysis["gross_profit_eth"],
-                gas_cost_eth=optimized_gas_cost_eth,
-                net_profit_eth=final_net_profit,
-                roi_percentage=final_roi,
+                gross_profit_eth=profit_analysis.gross_profit_eth,
+                gas_cost_eth=float(optimized_gas_cost_eth),
+                net_profit_eth=float(final_net_profit),
+                roi_percentage=float(final_roi),
                 profitable=final_profitable,
-                confidence_score=profit_analysis["confidence_score"],
-                risk_level=profit_analysis["risk_level"],
-                recommended_gas_price_gwei=gas_optimization["recommended_gas_price_gwei"],
-                simulation_success=simulation_result["success"],
-                execution_probability=profit_analysis["execution_probability"]
+                confidence_score=profit_analysis.confidence_score,
+                risk_level=profit_analysis.risk_level,
+                recommended_gas_price_gwei=gas_optimization.recommended_gas_price_gwei,
+                simulation_success=simulation_result.success,
+                execution_probability=profit_analysis.execution_probability
             )
             
         except Exception as e:
             logger.error(f"Error finalizing profit analysis: {e}")
-            return ProfitAnalysis(
-                gross_profit_eth=0.0,
-                gas_cost_eth=0.0,
-                net_profit_eth=0.0,
-                roi_percentage=0.0,
-                profitable=False,
-                confidence_score=0.0,
-                risk_level="high",
-                recommended_gas_price_gwei=0,
-                simulation_success=False,
-                execution_probability=0.0
-            )
+            return _ZERO_PROFIT_ANALYSIS
 
     async def _calculate_optimal_gas_price(self, current_gas_price_gwei: float, gas_estimate: int) -> float:
         """Calculate optimal gas price based on market conditions and urgency."""
         try:
             # Get recent gas price history
             if len(self._gas_price_history) > 10:
-                recent_prices = [price for _, price in self._gas_price_history[-10:]]
+                recent_prices = [self._gas_price_history[i][1] for i in range(-10, 0)]
                 avg_recent_price = sum(recent_prices) / len(recent_prices)
                 
                 # Adjust based on market trend
@@ -386,79 +738,22 @@ class ProfitOptimizer:
 
     def _calculate_profit_confidence(
         self, 
-        opportunity: Dict[str, Any], 
-        gas_analysis: Dict[str, Any], 
-        simulation_result: Dict[str, Any], 
+        opportunity: Opportunity, 
+        gas_analysis: GasAnalysis, 
+        simulation_result: SimResult, 
         net_profit: float
     ) -> float:
         """Calculate confidence score for profit prediction."""
-        try:
-            confidence = 0.5  # Base confidence
-            
-            # Adjust based on simulation success
-            if simulation_result["success"]:
-                confidence += 0.2
-            
-            # Adjust based on profit margin
-            if net_profit > 0.01:
-                confidence += 0.15
-            elif net_profit > 0.005:
-                confidence += 0.1
-            
-            # Adjust based on gas market conditions
-            market_conditions = gas_analysis.get("market_conditions", "unknown")
-            if market_conditions == "stable":
-                confidence += 0.1
-            elif market_conditions == "volatile":
-                confidence -= 0.1
-            
-            # Adjust based on opportunity type
-            opportunity_type = opportunity.get("type", "unknown")
-            if opportunity_type in ["arbitrage", "flashloan_arbitrage"]:
-                confidence += 0.05
-            elif opportunity_type in ["sandwich", "front_run"]:
-                confidence -= 0.1
-            
-            return max(0.1, min(1.0, confidence))
-            
-        except Exception as e:
-            logger.error(f"Error calculating profit confidence: {e}")
-            return 0.5
+        return calculate_profit_confidence(
+            opportunity.get("type", "unknown"),
+            gas_analysis.market_conditions,
+            simulation_result.success,
+            net_profit
+        )
 
-    def _assess_profit_risk(self, net_profit: float, roi_percentage: float, simulation_result: Dict[str, Any]) -> str:
+    def _assess_profit_risk(self, net_profit: float, roi_percentage: float, simulation_result: SimResult) -> str:
         """Assess risk level of profit opportunity."""
-        try:
-            risk_score = 0
-            
-            # Risk based on profit margin
-            if net_profit < 0.005:
-                risk_score += 3
-            elif net_profit < 0.01:
-                risk_score += 2
-            elif net_profit < 0.02:
-                risk_score += 1
-            
-            # Risk based on ROI
-            if roi_percentage < 5:
-                risk_score += 2
-            elif roi_percentage < 10:
-                risk_score += 1
-            
-            # Risk based on simulation
-            if not simulation_result["success"]:
-                risk_score += 2
-            
-            # Determine risk level
-            if risk_score >= 5:
-                return "high"
-            elif risk_score >= 3:
-                return "medium"
-            else:
-                return "low"
-                
-        except Exception as e:
-            logger.error(f"Error assessing profit risk: {e}")
-            return "high"
+        return assess_profit_risk(net_profit, roi_percentage, simulation_result.success)
 
     async def _assess_gas_market_conditions(self) -> str:
         """Assess current gas market conditions."""
@@ -466,7 +761,7 @@ class ProfitOptimizer:
             if len(self._gas_price_history) < 5:
                 return "unknown"
             
-            recent_prices = [price for _, price in self._gas_price_history[-5:]]
+            recent_prices = [self._gas_price_history[i][1] for i in range(-5, 0)]
             price_variance = sum((p - sum(recent_prices)/len(recent_prices))**2 for p in recent_prices) / len(recent_prices)
             
             if price_variance > 100:  # High variance
@@ -480,15 +775,33 @@ class ProfitOptimizer:
             logger.error(f"Error assessing gas market conditions: {e}")
             return "unknown"
 
+    def _log_analysis_summary(self, analyses: int, profitable: int, elapsed_ns: int):
+        """Accumulate analysis counts and log a summary at most once per interval."""
+        self._log_window_analyses += analyses
+        self._log_window_profitable += profitable
+        self._log_window_elapsed_ns += elapsed_ns
+        
+        now = time.monotonic()
+        window = now - self._log_last_ts
+        if window < _LOG_SUMMARY_INTERVAL_SECONDS:
+            return
+        
+        logger.info(
+            "Profit analysis: %d analyses (%d profitable) in last %.1fs, avg %.2fms",
+            self._log_window_analyses, self._log_window_profitable, window,
+            self._log_window_elapsed_ns / max(self._log_window_analyses, 1) / 1e6
+        )
+        self._log_last_ts = now
+        self._log_window_analyses = 0
+        self._log_window_profitable = 0
+        self._log_window_elapsed_ns = 0
+
     def _update_gas_price_history(self, gas_price_gwei: float):
         """Update gas price history for analysis."""
         try:
             current_time = int(time.time())
+            # Bounded deque evicts the oldest entry once the history is full
             self._gas_price_history.append((current_time, gas_price_gwei))
-            
-            # Keep only recent history
-            if len(self._gas_price_history) > self._max_history_size:
-                self._gas_price_history = self._gas_price_history[-self._max_history_size:]
                 
         except Exception as e:
             logger.error(f"Error updating gas price history: {e}")
@@ -551,35 +864,15 @@ class ProfitOptimizer:
         gas_cost_eth: float, 
         roi_threshold_pct: float = 5.0
     ) -> bool:
-        """
-        Determine if a trade is profitable based on ROI threshold.
-        
-        Args:
-            input_amt: Input amount in ETH
-            output_amt: Output amount in ETH
-            gas_cost_eth: Gas cost in ETH
-            roi_threshold_pct: Minimum ROI percentage required
-            
-        Returns:
-            True if ROI >= threshold, False otherwise
-        """
-        try:
-            if input_amt <= 0:
-                return False
-            
-            # Calculate net profit after gas costs
-            net_profit = output_amt - input_amt - gas_cost_eth
-            
-            # Calculate ROI percentage
-            roi_percentage = (net_profit / input_amt) * 100
-            
-            # Check if ROI meets threshold
-            is_profitable = roi_percentage >= roi_threshold_pct
-            
-            logger.debug(f"Trade ROI: {roi_percentage:.2f}% (threshold: {roi_threshold_pct}%) - Profitable: {is_profitable}")
-            
-            return is_profitable
-            
-        except Exception as e:
-            logger.error(f"Error calculating trade profitability: {e}")
-            return False 
\ No newline at end of file
+        """Determine if a trade is profitable based on ROI threshold."""
+        return is_profitable_trade(input_amt, output_amt, gas_cost_eth, roi_threshold_pct)
+
+    def are_profitable_trades(
+        self, 
+        input_amts: Any, 
+        output_amts: Any, 
+        gas_costs_eth: Any, 
+        roi_threshold_pct: float = 5.0
+    ) -> np.ndarray:
+        """Determine which of many trades are profitable based on ROI threshold."""
+        return are_profitable_trades(input_amts, output_amts, gas_costs_eth, roi_threshold_pct)
@@ -5,11 +5,26 @@ Performs security-focused checks on critical components.
 """
 
 import asyncio
+import contextlib
+import copy
+import json
 import logging
+import operator
 import time
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, Final, List, Set, Tuple, Any, Optional
 from dataclasses import dataclass
+from functools import cached_property, wraps
 
+import aiohttp
+
+# Use orjson for report serialization if available
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+from on1builder.config.loaders import settings
 from on1builder.utils.web3_factory import Web3ConnectionFactory
 from on1builder.monitoring.flashbots_relay import FlashbotsRelay
 from on1builder.engines.safety_guard import SafetyGuard
@@ -17,7 +32,7 @@ from on1builder.utils.profit_optimizer import ProfitOptimizer
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SecurityIssue:
     """Represents a security issue found during audit."""
     severity: str  # 'critical', 'high', 'medium', 'low'
@@ -27,6 +42,92 @@ class SecurityIssue:
     impact: str
     recommendation: str
 
+# Fields of a SecurityIssue included in the report, read in one C-level call.
+_ISSUE_REPORT_FIELDS = ("component", "issue_type", "description", "impact", "recommendation")
+_get_issue_report_fields = operator.attrgetter(*_ISSUE_REPORT_FIELDS)
+
+# Follow-up advice for each component that reported at least one issue, in report order.
+_COMPONENT_RECOMMENDATIONS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("flashloan_atomicity", "Review flash loan implementation to ensure atomicity"),
+    ("risk_controls", "Strengthen risk control enforcement mechanisms"),
+    ("flashbots_relay", "Verify Flashbots relay configuration and connectivity"),
+    ("profit_calculation", "Audit profit calculation logic for edge cases"),
+)
+
+# Human-readable area each component covers, used in "Unable to verify ..." impact text.
+_COMPONENT_SUBJECTS: Final[Dict[str, str]] = {
+    "flashloan_atomicity": "flash loan",
+    "bundle_simulation": "bundle simulation",
+    "risk_controls": "risk control",
+    "flashbots_relay": "Flashbots relay",
+    "profit_calculation": "profit calculation",
+}
+
+# Audit reports are reused until the chain has advanced this many blocks.
+_REPORT_TTL_BLOCKS: Final[int] = 5
+
+# Profit calculation inputs that must be rejected, either by returning False or raising:
+# (input_amt, output_amt, gas_cost_eth, roi_threshold_pct)
+_INVALID_PROFIT_CASES: Final[Tuple[Tuple[float, float, float, float], ...]] = (
+    (0, 1, 0.1, 5.0),  # Zero input
+    (1, 0, 0.1, 5.0),  # Zero output
+    (-1, 1, 0.1, 5.0),  # Negative input
+    (1, 1, -0.1, 5.0),  # Negative gas cost
+)
+
+# Well-formed trades and the answer expected for each:
+# (input_amt, output_amt, gas_cost_eth, roi_threshold_pct, expected)
+_VALID_PROFIT_CASES: Final[Tuple[Tuple[float, float, float, float, bool], ...]] = (
+    (1, 1.06, 0.01, 5.0, True),  # Profitable trade
+    (1, 1.03, 0.01, 5.0, False),  # Unprofitable trade
+)
+
+# Fixed fields of the issues the profit check can raise; only the description varies
+_CALCULATION_ERROR_ISSUE: Final[Dict[str, str]] = {
+    "severity": "high",
+    "component": "profit_calculation",
+    "issue_type": "calculation_error",
+    "impact": "Incorrect profit calculations could lead to unprofitable trades",
+    "recommendation": "Fix profit calculation logic for edge cases",
+}
+_UNEXPECTED_EXCEPTION_ISSUE: Final[Dict[str, str]] = {
+    "severity": "medium",
+    "component": "profit_calculation",
+    "issue_type": "unexpected_exception",
+    "impact": "Profit calculation failures could prevent trade execution",
+    "recommendation": "Improve exception handling in profit calculation",
+}
+
+def _audit_test(component: str, subject: str, severity: str = "high"):
+    """
+    Report a sub-test that fails to run as a test_failure issue.
+    
+    Args:
+        component: Component the sub-test audits
+        subject: Human-readable name used in the log and issue text
+        severity: Severity of the issue recorded on failure
+    """
+    def decorator(test):
+        @wraps(test)
+        async def wrapper(self: "SecurityAuditor"):
+            try:
+                return await test(self)
+            except Exception as e:
+                logger.error(
+                    "Error testing %s: %s", subject, e,
+                    extra={"extra_data": {"component": component, "issue_type": "test_failure", "error": repr(e)}}
+                )
+                self._add_issue(
+                    severity=severity,
+                    component=component,
+                    issue_type="test_failure",
+                    description=f"{subject[0].upper()}{subject[1:]} test failed: {e}",
+                    impact=f"Unable to verify {_COMPONENT_SUBJECTS[component]} security",
+                    recommendation=f"Fix {subject} test and re-run"
+                )
+        return wrapper
+    return decorator
+
 class SecurityAuditor:
     """
     Security auditor for MEV bot critical components.
@@ -34,410 +135,474 @@ class SecurityAuditor:
     
     def __init__(self, web3_factory: Web3ConnectionFactory):
         self.web3_factory = web3_factory
-        self.issues: List[SecurityIssue] = []
+        self.issues_by_severity: Dict[str, List[SecurityIssue]] = {
+            "critical": [], "high": [], "medium": [], "low": []
+        }
+        self.issue_components: Set[str] = set()
         self.test_results: Dict[str, Any] = {}
+        
+        # Last report and the block it was generated at
+        self._cached_report: Optional[Tuple[int, Dict[str, Any]]] = None
+        self.report_cache_stats = {"hits": 0, "misses": 0}
+        
+        # HTTP session pooled across all sub-tests for the duration of an audit
+        self._http_session: Optional[aiohttp.ClientSession] = None
+    
+    @property
+    def issues(self) -> Tuple[SecurityIssue, ...]:
+        """All issues found so far, most severe first; record new ones with _add_issue."""
+        return tuple(issue for issues in self.issues_by_severity.values() for issue in issues)
+    
+    def _add_issue(
+        self,
+        severity: str,
+        component: str,
+        issue_type: str,
+        description: str,
+        impact: str,
+        recommendation: str
+    ):
+        """Record an issue directly in its severity bucket."""
+        self.issues_by_severity[severity].append(SecurityIssue(
+            severity=severity,
+            component=component,
+            issue_type=issue_type,
+            description=description,
+            impact=impact,
+            recommendation=recommendation
+        ))
+        self.issue_components.add(component)
+    
+    # Components are created on first use and shared by every sub-test
+    @cached_property
+    def web3(self):
+        return self.web3_factory.get_web3()
+    
+    @cached_property
+    def flashbots_relay(self) -> FlashbotsRelay:
+        return FlashbotsRelay(self.web3, settings.wallet_key, session=self._http_session)
+    
+    @cached_property
+    def safety_guard(self) -> SafetyGuard:
+        return SafetyGuard(self.web3_factory)
     
-    async def run_security_audit(self) -> Dict[str, Any]:
-        """Run comprehensive security audit."""
+    @cached_property
+    def profit_optimizer(self) -> ProfitOptimizer:
+        return ProfitOptimizer()
+    
+    async def _close_flashbots_relay(self):
+        """Close the shared relay's HTTP session if a sub-test created it."""
+        flashbots_relay = self.__dict__.pop("flashbots_relay", None)
+        if flashbots_relay is not None:
+            await flashbots_relay.stop()
+    
+    async def _get_block_number(self) -> Optional[int]:
+        """Current block number, or None if the node cannot be reached."""
+        try:
+            return await self.web3.eth.block_number
+        except Exception as e:
+            logger.warning("Unable to fetch block number for audit report cache: %s", e)
+            return None
+    
+    async def run_security_audit(self, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Run comprehensive security audit, reusing a recent report within the same block window.
+        
+        Args:
+            use_cache: Reuse and store reports by block number; if False, skip the block number lookup
+        """
+        current_block = await self._get_block_number() if use_cache else None
+        if (
+            current_block is not None
+            and self._cached_report is not None
+            and current_block - self._cached_report[0] < _REPORT_TTL_BLOCKS
+        ):
+            self.report_cache_stats["hits"] += 1
+            # Hand out a copy so callers cannot alter the cached report
+            return copy.deepcopy(self._cached_report[1])
+        self.report_cache_stats["misses"] += 1
+        
         logger.info("Starting security audit...")
         
+        # Start from a clean slate so repeated audits do not accumulate findings
+        for issues in self.issues_by_severity.values():
+            issues.clear()
+        self.issue_components.clear()
+        self.test_results = {}
+        
         try:
-            # Test flash loan atomicity
-            await self._test_flashloan_atomicity()
-            
-            # Test bundle simulation handling
-            await self._test_bundle_simulation_handling()
-            
-            # Test risk control enforcement
-            await self._test_risk_control_enforcement()
-            
-            # Test Flashbots relay security
-            await self._test_flashbots_relay_security()
+            # Sub-tests only wait on the node and relay, so run them concurrently
+            audit_tests = (
+                ("flashloan_atomicity", self._test_flashloan_atomicity),
+                ("bundle_simulation", self._test_bundle_simulation_handling),
+                ("risk_controls", self._test_risk_control_enforcement),
+                ("flashbots_relay", self._test_flashbots_relay_security),
+                ("profit_calculation", self._test_profit_calculation_integrity),
+            )
+            try:
+                async with contextlib.AsyncExitStack() as stack:
+                    self._http_session = await stack.enter_async_context(aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=30),
+                        timeout=aiohttp.ClientTimeout(total=10)
+                    ))
+                    stack.push_async_callback(self._close_flashbots_relay)
+                    results = await asyncio.gather(
+                        *(test() for _, test in audit_tests), return_exceptions=True
+                    )
+            finally:
+                # Never leave a closed session behind for the next audit's relay
+                self._http_session = None
             
-            # Test profit calculation integrity
-            await self._test_profit_calculation_integrity()
+            for (component, _), result in zip(audit_tests, results):
+                if isinstance(result, BaseException):
+                    logger.error(
+                        "Security test for %s raised: %s", component, result,
+                        extra={"extra_data": {"component": component, "issue_type": "test_failure", "error": repr(result)}}
+                    )
+                    self._add_issue(
+                        severity="high",
+                        component=component,
+                        issue_type="test_failure",
+                        description=f"Security test raised unexpectedly: {result}",
+                        impact=f"Unable to verify {_COMPONENT_SUBJECTS[component]} security",
+                        recommendation="Fix the failing security test and re-run"
+                    )
             
             # Generate security report
             report = self._generate_security_report()
             
-            logger.info(f"Security audit completed. Found {len(self.issues)} issues.")
+            logger.info("Security audit completed. Found %d issues.", report["summary"]["total_issues"])
+            if current_block is not None:
+                self._cached_report = (current_block, copy.deepcopy(report))
             return report
             
         except Exception as e:
-            logger.error(f"Error during security audit: {e}")
+            logger.error("Error during security audit: %s", e)
             return {"error": str(e), "issues": []}
     
+    @_audit_test("flashloan_atomicity", "flash loan atomicity")
     async def _test_flashloan_atomicity(self):
         """Test that flash loan transactions are atomic (all or nothing)."""
+        logger.info("Testing flash loan atomicity...")
+        
+        # Create a test flash loan transaction that would fail
+        test_tx = {
+            "to": "0x0000000000000000000000000000000000000000",  # Invalid address
+            "value": 0,
+            "data": "0x",  # Invalid data
+            "gas": 21000,
+            "gasPrice": 20000000000
+        }
+        
+        # Attempt to execute the transaction
+        web3 = self.web3
+        
         try:
-            logger.info("Testing flash loan atomicity...")
-            
-            # Create a test flash loan transaction that would fail
-            test_tx = {
-                "to": "0x0000000000000000000000000000000000000000",  # Invalid address
-                "value": 0,
-                "data": "0x",  # Invalid data
-                "gas": 21000,
-                "gasPrice": 20000000000
-            }
-            
-            # Attempt to execute the transaction
-            web3 = self.web3_factory.get_web3()
-            
-            try:
-                # This should fail and revert the entire transaction
-                result = await web3.eth.call(test_tx)
-                self.issues.append(SecurityIssue(
-                    severity="critical",
-                    component="flashloan_atomicity",
-                    issue_type="atomicity_failure",
-                    description="Flash loan transaction did not revert as expected",
-                    impact="Non-atomic transactions could lead to partial execution and fund loss",
-                    recommendation="Ensure all flash loan transactions are properly atomic"
-                ))
-            except Exception as e:
-                # Expected failure - atomicity working correctly
-                logger.info("Flash loan atomicity test passed - transaction properly reverted")
-                self.test_results["flashloan_atomicity"] = "PASS"
-                
-        except Exception as e:
-            logger.error(f"Error testing flash loan atomicity: {e}")
-            self.issues.append(SecurityIssue(
-                severity="high",
+            # This should fail and revert the entire transaction
+            result = await web3.eth.call(test_tx)
+            self._add_issue(
+                severity="critical",
                 component="flashloan_atomicity",
-                issue_type="test_failure",
-                description=f"Flash loan atomicity test failed: {e}",
-                impact="Unable to verify flash loan security",
-                recommendation="Fix flash loan atomicity test and re-run"
-            ))
+                issue_type="atomicity_failure",
+                description="Flash loan transaction did not revert as expected",
+                impact="Non-atomic transactions could lead to partial execution and fund loss",
+                recommendation="Ensure all flash loan transactions are properly atomic"
+            )
+        except Exception as e:
+            # Expected failure - atomicity working correctly
+            logger.info("Flash loan atomicity test passed - transaction properly reverted")
+            self.test_results["flashloan_atomicity"] = "PASS"
     
+    @_audit_test("bundle_simulation", "bundle simulation", severity="medium")
     async def _test_bundle_simulation_handling(self):
         """Test proper handling of failed bundle simulations."""
-        try:
-            logger.info("Testing bundle simulation handling...")
-            
-            # Create a mock Flashbots relay for testing
-            flashbots_relay = FlashbotsRelay(self.web3_factory)
-            
-            # Test with invalid bundle
-            invalid_bundle = {
-                "txs": ["invalid_transaction_data"],
-                "blockNumber": "0x0",
-                "minTimestamp": 0,
-                "maxTimestamp": 0
-            }
-            
-            # Simulate the invalid bundle
-            simulation_result = await flashbots_relay.simulate_bundle(invalid_bundle)
-            
-            # Check if simulation properly handles failure
-            if simulation_result.get("success", True):  # Should be False for invalid bundle
-                self.issues.append(SecurityIssue(
-                    severity="high",
-                    component="bundle_simulation",
-                    issue_type="simulation_failure_handling",
-                    description="Bundle simulation did not properly handle invalid bundle",
-                    impact="Invalid bundles might be executed",
-                    recommendation="Improve bundle simulation error handling"
-                ))
-            else:
-                logger.info("Bundle simulation handling test passed")
-                self.test_results["bundle_simulation_handling"] = "PASS"
-                
-        except Exception as e:
-            logger.error(f"Error testing bundle simulation handling: {e}")
-            self.issues.append(SecurityIssue(
-                severity="medium",
+        logger.info("Testing bundle simulation handling...")
+        
+        # Shared relay, so simulate and submit reuse one HTTP session
+        flashbots_relay = self.flashbots_relay
+        
+        # Test with invalid bundle
+        invalid_bundle = {
+            "txs": ["invalid_transaction_data"],
+            "blockNumber": "0x0",
+            "minTimestamp": 0,
+            "maxTimestamp": 0
+        }
+        
+        # Simulate the invalid bundle
+        simulation_result = await flashbots_relay.simulate_bundle(invalid_bundle)
+        
+        # Check if simulation properly handles failure
+        if simulation_result.get("success", True):  # Should be False for invalid bundle
+            self._add_issue(
+                severity="high",
                 component="bundle_simulation",
-                issue_type="test_failure",
-                description=f"Bundle simulation test failed: {e}",
-                impact="Unable to verify bundle simulation security",
-                recommendation="Fix bundle simulation test and re-run"
-            ))
+                issue_type="simulation_failure_handling",
+                description="Bundle simulation did not properly handle invalid bundle",
+                impact="Invalid bundles might be executed",
+                recommendation="Improve bundle simulation error handling"
+            )
+        else:
+            logger.info("Bundle simulation handling test passed")
+            self.test_results["bundle_simulation_handling"] = "PASS"
     
+    @_audit_test("risk_controls", "risk control")
     async def _test_risk_control_enforcement(self):
         """Test that risk control parameters are properly enforced."""
-        try:
-            logger.info("Testing risk control enforcement...")
-            
-            # Create safety guard instance
-            safety_guard = SafetyGuard(self.web3_factory)
-            
-            # Test emergency pause functionality
-            safety_guard.set_emergency_pause(True)
-            
-            # Test transaction with emergency pause active
-            test_tx_params = {
-                "to": "0x0000000000000000000000000000000000000000",
-                "value": 0,
-                "data": "0x",
-                "gas": 21000,
-                "gasPrice": 20000000000
-            }
-            
-            # Check risk controls
-            is_safe, reason = await safety_guard.check_risk_controls(test_tx_params)
-            
-            if is_safe:
-                self.issues.append(SecurityIssue(
-                    severity="critical",
-                    component="risk_controls",
-                    issue_type="emergency_pause_bypass",
-                    description="Transaction allowed despite emergency pause being active",
-                    impact="Emergency pause can be bypassed, leading to unwanted transactions",
-                    recommendation="Fix emergency pause enforcement in risk controls"
-                ))
-            else:
-                logger.info("Risk control enforcement test passed")
-                self.test_results["risk_control_enforcement"] = "PASS"
-            
-            # Reset emergency pause
-            safety_guard.set_emergency_pause(False)
-            
-            # Test gas price ceiling
-            # Simulate high gas price scenario
-            high_gas_tx = {
-                "gasPrice": 200000000000  # 200 gwei
-            }
-            
-            is_safe, reason = await safety_guard.check_risk_controls(high_gas_tx)
-            
-            if is_safe:
-                self.issues.append(SecurityIssue(
-                    severity="high",
-                    component="risk_controls",
-                    issue_type="gas_ceiling_bypass",
-                    description="Transaction allowed despite exceeding gas ceiling",
-                    impact="Gas ceiling can be bypassed",
-                    recommendation="Fix gas ceiling enforcement in risk controls"
-                ))
-            else:
-                logger.info("Gas ceiling enforcement test passed")
-                
-        except Exception as e:
-            logger.error(f"Error testing risk control enforcement: {e}")
-            self.issues.append(SecurityIssue(
+        logger.info("Testing risk control enforcement...")
+        
+        safety_guard = self.safety_guard
+        
+        # Test emergency pause functionality
+        safety_guard.set_emergency_pause(True)
+        
+        # Test transaction with emergency pause active
+        test_tx_params = {
+            "to": "0x0000000000000000000000000000000000000000",
+            "value": 0,
+            "data": "0x",
+            "gas": 21000,
+            "gasPrice": 20000000000
+        }
+        
+        # Check risk controls
+        is_safe, reason = await safety_guard.check_risk_controls(test_tx_params)
+        
+        if is_safe:
+            self._add_issue(
+                severity="critical",
+                component="risk_controls",
+                issue_type="emergency_pause_bypass",
+                description="Transaction allowed despite emergency pause being active",
+                impact="Emergency pause can be bypassed, leading to unwanted transactions",
+                recommendation="Fix emergency pause enforcement in risk controls"
+            )
+        else:
+            logger.info("Risk control enforcement test passed")
+            self.test_results["risk_control_enforcement"] = "PASS"
+        
+        # Reset emergency pause
+        safety_guard.set_emergency_pause(False)
+        
+        # Test gas price ceiling
+        # Simulate high gas price scenario
+        high_gas_tx = {
+            "gasPrice": 200000000000  # 200 gwei
+        }
+        
+        is_safe, reason = await safety_guard.check_risk_controls(high_gas_tx)
+        
+        if is_safe:
+            self._add_issue(
                 severity="high",
                 component="risk_controls",
-                issue_type="test_failure",
-                description=f"Risk control test failed: {e}",
-                impact="Unable to verify risk control security",
-                recommendation="Fix risk control test and re-run"
-            ))
+                issue_type="gas_ceiling_bypass",
+                description="Transaction allowed despite exceeding gas ceiling",
+                impact="Gas ceiling can be bypassed",
+                recommendation="Fix gas ceiling enforcement in risk controls"
+            )
+        else:
+            logger.info("Gas ceiling enforcement test passed")
+            self.test_results["gas_ceiling_enforcement"] = "PASS"
     
+    @_audit_test("flashbots_relay", "Flashbots relay")
     async def _test_flashbots_relay_security(self):
         """Test Flashbots relay connection security and reliability."""
-        try:
-            logger.info("Testing Flashbots relay security...")
-            
-            # Create Flashbots relay instance
-            flashbots_relay = FlashbotsRelay(self.web3_factory)
+        logger.info("Testing Flashbots relay security...")
+        
+        # Shared relay, so simulate and submit reuse one HTTP session
+        flashbots_relay = self.flashbots_relay
+        
+        # Test connection
+        is_connected = await flashbots_relay.connect()
+        
+        if not is_connected:
+            self._add_issue(
+                severity="high",
+                component="flashbots_relay",
+                issue_type="connection_failure",
+                description="Unable to connect to Flashbots relay",
+                impact="Cannot submit bundles, reducing MEV opportunities",
+                recommendation="Check Flashbots relay configuration and network connectivity"
+            )
+        else:
+            logger.info("Flashbots relay connection test passed")
+            self.test_results["flashbots_relay_connection"] = "PASS"
             
-            # Test connection
-            is_connected = await flashbots_relay.connect()
+            # Test bundle submission with valid transaction
+            test_bundle = {
+                "txs": ["0x"],  # Empty transaction
+                "blockNumber": "0x0",
+                "minTimestamp": 0,
+                "maxTimestamp": 0
+            }
             
-            if not is_connected:
-                self.issues.append(SecurityIssue(
-                    severity="high",
-                    component="flashbots_relay",
-                    issue_type="connection_failure",
-                    description="Unable to connect to Flashbots relay",
-                    impact="Cannot submit bundles, reducing MEV opportunities",
-                    recommendation="Check Flashbots relay configuration and network connectivity"
-                ))
-            else:
-                logger.info("Flashbots relay connection test passed")
-                self.test_results["flashbots_relay_connection"] = "PASS"
-                
-                # Test bundle submission with valid transaction
-                test_bundle = {
-                    "txs": ["0x"],  # Empty transaction
-                    "blockNumber": "0x0",
-                    "minTimestamp": 0,
-                    "maxTimestamp": 0
-                }
+            try:
+                submission_result = await flashbots_relay.submit_bundle(
+                    transactions=["0x"],
+                    target_block=1
+                )
                 
-                try:
-                    submission_result = await flashbots_relay.submit_bundle(
-                        transactions=["0x"],
-                        target_block=1
+                # Check if submission was handled properly
+                if not submission_result.get("success", False):
+                    logger.info("Flashbots relay submission handling test passed")
+                    self.test_results["flashbots_relay_submission"] = "PASS"
+                else:
+                    self._add_issue(
+                        severity="medium",
+                        component="flashbots_relay",
+                        issue_type="invalid_submission_accepted",
+                        description="Flashbots relay accepted invalid bundle submission",
+                        impact="Invalid bundles might be processed",
+                        recommendation="Improve bundle validation before submission"
                     )
                     
-                    # Check if submission was handled properly
-                    if not submission_result.get("success", False):
-                        logger.info("Flashbots relay submission handling test passed")
-                        self.test_results["flashbots_relay_submission"] = "PASS"
-                    else:
-                        self.issues.append(SecurityIssue(
-                            severity="medium",
-                            component="flashbots_relay",
-                            issue_type="invalid_submission_accepted",
-                            description="Flashbots relay accepted invalid bundle submission",
-                            impact="Invalid bundles might be processed",
-                            recommendation="Improve bundle validation before submission"
-                        ))
-                        
-                except Exception as e:
-                    logger.info(f"Flashbots relay submission test passed (expected error: {e})")
-                    self.test_results["flashbots_relay_submission"] = "PASS"
-                
-        except Exception as e:
-            logger.error(f"Error testing Flashbots relay security: {e}")
-            self.issues.append(SecurityIssue(
-                severity="high",
-                component="flashbots_relay",
-                issue_type="test_failure",
-                description=f"Flashbots relay test failed: {e}",
-                impact="Unable to verify Flashbots relay security",
-                recommendation="Fix Flashbots relay test and re-run"
-            ))
+            except Exception as e:
+                logger.info("Flashbots relay submission test passed (expected error: %s)", e)
+                self.test_results["flashbots_relay_submission"] = "PASS"
     
+    @_audit_test("profit_calculation", "profit calculation")
     async def _test_profit_calculation_integrity(self):
         """Test profit calculation integrity and edge cases."""
-        try:
-            logger.info("Testing profit calculation integrity...")
-            
-            profit_optimizer = ProfitOptimizer()
-            
-            # Test edge cases
-            test_cases = [
-                # (input_amt, output_amt, gas_cost_eth, roi_threshold_pct, expected)
-                (0, 1, 0.1, 5.0, False),  # Zero input
-                (1, 0, 0.1, 5.0, False),  # Zero output
-                (1, 1.06, 0.01, 5.0, True),  # Profitable trade
-                (1, 1.03, 0.01, 5.0, False),  # Unprofitable trade
-                (-1, 1, 0.1, 5.0, False),  # Negative input
-                (1, 1, -0.1, 5.0, False),  # Negative gas cost
-            ]
-            
-            for input_amt, output_amt, gas_cost_eth, roi_threshold_pct, expected in test_cases:
-                try:
-                    result = profit_optimizer.is_profitable_trade(
-                        input_amt, output_amt, gas_cost_eth, roi_threshold_pct
-                    )
-                    
-                    if result != expected:
-                        self.issues.append(SecurityIssue(
-                            severity="high",
-                            component="profit_calculation",
-                            issue_type="calculation_error",
-                            description=f"Profit calculation failed for case: input={input_amt}, output={output_amt}, gas={gas_cost_eth}",
-                            impact="Incorrect profit calculations could lead to unprofitable trades",
-                            recommendation="Fix profit calculation logic for edge cases"
-                        ))
-                        
-                except Exception as e:
-                    # Expected for invalid inputs
-                    if input_amt <= 0 or output_amt < 0:
-                        logger.info(f"Profit calculation properly handled invalid input: {e}")
-                    else:
-                        self.issues.append(SecurityIssue(
-                            severity="medium",
-                            component="profit_calculation",
-                            issue_type="unexpected_exception",
-                            description=f"Unexpected exception in profit calculation: {e}",
-                            impact="Profit calculation failures could prevent trade execution",
-                            recommendation="Improve exception handling in profit calculation"
-                        ))
+        logger.info("Testing profit calculation integrity...")
+        
+        # Bind once; the check is pure CPU so cases run inline rather than in threads
+        is_profitable_trade = self.profit_optimizer.is_profitable_trade
+        
+        # Invalid inputs must never be reported as profitable; raising is also acceptable
+        for input_amt, output_amt, gas_cost_eth, roi_threshold_pct in _INVALID_PROFIT_CASES:
+            try:
+                accepted = is_profitable_trade(input_amt, output_amt, gas_cost_eth, roi_threshold_pct)
+            except Exception as e:
+                logger.info(
+                    "Profit calculation properly rejected invalid input: %s", e,
+                    extra={"extra_data": {"component": "profit_calculation", "error": repr(e)}}
+                )
+                continue
             
-            logger.info("Profit calculation integrity test passed")
-            self.test_results["profit_calculation_integrity"] = "PASS"
+            if accepted:
+                self._add_issue(
+                    **_CALCULATION_ERROR_ISSUE,
+                    description=f"Profit calculation failed for case: input={input_amt}, output={output_amt}, gas={gas_cost_eth}"
+                )
+        
+        # Well-formed trades must return the expected answer without raising
+        for input_amt, output_amt, gas_cost_eth, roi_threshold_pct, expected in _VALID_PROFIT_CASES:
+            try:
+                result = is_profitable_trade(input_amt, output_amt, gas_cost_eth, roi_threshold_pct)
+            except Exception as e:
+                self._add_issue(
+                    **_UNEXPECTED_EXCEPTION_ISSUE,
+                    description=f"Unexpected exception in profit calculation: {e}"
+                )
+                continue
             
-        except Exception as e:
-            logger.error(f"Error testing profit calculation integrity: {e}")
-            self.issues.append(SecurityIssue(
-                severity="high",
-                component="profit_calculation",
-                issue_type="test_failure",
-                description=f"Profit calculation test failed: {e}",
-                impact="Unable to verify profit calculation security",
-                recommendation="Fix profit calculation test and re-run"
-            ))
+            # Only a mismatch pays for building the issue description
+            if result != expected:
+                self._add_issue(
+                    **_CALCULATION_ERROR_ISSUE,
+                    description=f"Profit calculation failed for case: input={input_amt}, output={output_amt}, gas={gas_cost_eth}"
+                )
+        
+        logger.info("Profit calculation integrity test passed")
+        self.test_results["profit_calculation_integrity"] = "PASS"
+    
+    def report_json(self, indent: bool = False) -> bytes:
+        """
+        Serialize the current security report to JSON.
+        
+        The document has the same schema as the dict returned by run_security_audit.
+        
+        Args:
+            indent: Pretty-print with two-space indentation
+        
+        Returns:
+            UTF-8 encoded JSON document
+        """
+        report = self._generate_security_report()
+        if HAVE_ORJSON:
+            return orjson.dumps(report, option=orjson.OPT_INDENT_2 if indent else None)
+        return json.dumps(report, indent=2 if indent else None).encode()
     
     def _generate_security_report(self) -> Dict[str, Any]:
         """Generate comprehensive security report."""
-        critical_issues = [i for i in self.issues if i.severity == "critical"]
-        high_issues = [i for i in self.issues if i.severity == "high"]
-        medium_issues = [i for i in self.issues if i.severity == "medium"]
-        low_issues = [i for i in self.issues if i.severity == "low"]
+        buckets = self.issues_by_severity
+        severity_counts = {severity: len(issues) for severity, issues in buckets.items()}
         
         # Calculate security score
-        total_issues = len(self.issues)
-        critical_score = len(critical_issues) * 10
-        high_score = len(high_issues) * 5
-        medium_score = len(medium_issues) * 2
-        low_score = len(low_issues) * 1
-        
-        security_score = max(0, 100 - critical_score - high_score - medium_score - low_score)
+        security_score = max(
+            0,
+            100
+            - severity_counts["critical"] * 10
+            - severity_counts["high"] * 5
+            - severity_counts["medium"] * 2
+            - severity_counts["low"]
+        )
         
         return {
             "summary": {
-                "total_issues": total_issues,
-                "critical": len(critical_issues),
-                "high": len(high_issues),
-                "medium": len(medium_issues),
-                "low": len(low_issues),
+                "total_issues": sum(severity_counts.values()),
+                **severity_counts,
                 "security_score": security_score
             },
             "test_results": self.test_results,
             "issues_by_severity": {
-                "critical": [self._issue_to_dict(i) for i in critical_issues],
-                "high": [self._issue_to_dict(i) for i in high_issues],
-                "medium": [self._issue_to_dict(i) for i in medium_issues],
-                "low": [self._issue_to_dict(i) for i in low_issues]
+                severity: [dict(zip(_ISSUE_REPORT_FIELDS, _get_issue_report_fields(i))) for i in issues]
+                for severity, issues in buckets.items()
             },
-            "recommendations": self._generate_security_recommendations()
-        }
-    
-    def _issue_to_dict(self, issue: SecurityIssue) -> Dict:
-        """Convert security issue to dictionary."""
-        return {
-            "component": issue.component,
-            "issue_type": issue.issue_type,
-            "description": issue.description,
-            "impact": issue.impact,
-            "recommendation": issue.recommendation
+            "recommendations": self._generate_security_recommendations(severity_counts)
         }
     
-    def _generate_security_recommendations(self) -> List[str]:
+    def _generate_security_recommendations(self, severity_counts: Dict[str, int]) -> List[str]:
         """Generate security recommendations based on findings."""
         recommendations = []
+        components = self.issue_components
         
-        critical_count = len([i for i in self.issues if i.severity == "critical"])
+        critical_count = severity_counts["critical"]
         if critical_count > 0:
             recommendations.append(f"CRITICAL: Fix {critical_count} critical security issues immediately")
         
-        high_count = len([i for i in self.issues if i.severity == "high"])
+        high_count = severity_counts["high"]
         if high_count > 0:
             recommendations.append(f"HIGH: Address {high_count} high-severity issues before deployment")
         
         # Component-specific recommendations
-        components = set(i.component for i in self.issues)
-        
-        if "flashloan_atomicity" in components:
-            recommendations.append("Review flash loan implementation to ensure atomicity")
-        
-        if "risk_controls" in components:
-            recommendations.append("Strengthen risk control enforcement mechanisms")
-        
-        if "flashbots_relay" in components:
-            recommendations.append("Verify Flashbots relay configuration and connectivity")
-        
-        if "profit_calculation" in components:
-            recommendations.append("Audit profit calculation logic for edge cases")
+        recommendations.extend(
+            recommendation for component, recommendation in _COMPONENT_RECOMMENDATIONS
+            if component in components
+        )
         
         return recommendations
 
 async def run_security_audit(web3_factory: Web3ConnectionFactory) -> Dict[str, Any]:
     """Run the security audit and return results."""
     auditor = SecurityAuditor(web3_factory)
-    return await auditor.run_security_audit()
+    return await auditor.run_security_audit(use_cache=False)
+
+class _DummyKeyAuditor(SecurityAuditor):
+    """
+    Auditor for running this script directly against a live node.
+    
+    Components are built from a web3 instance and a dummy signing key instead of a factory.
+    """
+    
+    def __init__(self, web3, dummy_private_key: str):
+        super().__init__(web3_factory=None)
+        self.web3 = web3
+        self.dummy_private_key = dummy_private_key
+        self.flashbots_relay = FlashbotsRelay(web3, dummy_private_key)
+        self.safety_guard = SafetyGuard(web3)
+        self.profit_optimizer = ProfitOptimizer(web3)
+    
+    @_audit_test("flashbots_relay", "Flashbots relay")
+    async def _test_flashbots_relay_security(self):
+        """Skip relay submission, which needs a funded key and a live relay."""
+        logger.info("Testing Flashbots relay security...")
+        logger.info("Flashbots relay security test skipped (requires real environment)")
+        self.test_results["flashbots_relay_security"] = "SKIPPED"
 
 if __name__ == "__main__":
     # Run security audit when script is executed directly
-    import json
-    from on1builder.utils.web3_factory import Web3ConnectionFactory
-    
     async def main():
         # Use mainnet chain_id=1 for test, or replace with config value
         chain_id = 1
@@ -446,221 +611,16 @@ if __name__ == "__main__":
 
         # Create web3 instance using the factory
         web3 = await Web3ConnectionFactory.create_connection(chain_id)
+        auditor = _DummyKeyAuditor(web3, dummy_private_key)
 
-        # Pass web3 and dummy key to components
-        # FlashbotsRelay expects (web3_factory, private_key)
-        # ProfitOptimizer expects web3
-        # Patch SecurityAuditor to accept these as needed
-        auditor = SecurityAuditor(web3_factory=None)  # We'll patch methods below
-        auditor.web3 = web3
-        auditor.dummy_private_key = dummy_private_key
-
-        # Patch methods to use the correct web3 and private_key
-        async def patched_test_flashloan_atomicity(self):
-            try:
-                logger.info("Testing flash loan atomicity...")
-                test_tx = {
-                    "to": "0x0000000000000000000000000000000000000000",
-                    "value": 0,
-                    "data": "0x",
-                    "gas": 21000,
-                    "gasPrice": 20000000000
-                }
-                try:
-                    result = await self.web3.eth.call(test_tx)
-                    self.issues.append(SecurityIssue(
-                        severity="critical",
-                        component="flashloan_atomicity",
-                        issue_type="atomicity_failure",
-                        description="Flash loan transaction did not revert as expected",
-                        impact="Non-atomic transactions could lead to partial execution and fund loss",
-                        recommendation="Ensure all flash loan transactions are properly atomic"
-                    ))
-                except Exception as e:
-                    logger.info("Flash loan atomicity test passed - transaction properly reverted")
-                    self.test_results["flashloan_atomicity"] = "PASS"
-            except Exception as e:
-                logger.error(f"Error testing flash loan atomicity: {e}")
-                self.issues.append(SecurityIssue(
-                    severity="high",
-                    component="flashloan_atomicity",
-                    issue_type="test_failure",
-                    description=f"Flash loan atomicity test failed: {e}",
-                    impact="Unable to verify flash loan security",
-                    recommendation="Fix flash loan atomicity test and re-run"
-                ))
-        auditor._test_flashloan_atomicity = patched_test_flashloan_atomicity.__get__(auditor)
-
-        async def patched_test_bundle_simulation_handling(self):
-            try:
-                logger.info("Testing bundle simulation handling...")
-                from on1builder.monitoring.flashbots_relay import FlashbotsRelay
-                flashbots_relay = FlashbotsRelay(self.web3, self.dummy_private_key)
-                invalid_bundle = {
-                    "txs": ["invalid_transaction_data"],
-                    "blockNumber": "0x0",
-                    "minTimestamp": 0,
-                    "maxTimestamp": 0
-                }
-                simulation_result = await flashbots_relay.simulate_bundle(invalid_bundle)
-                if simulation_result.get("success", True):
-                    self.issues.append(SecurityIssue(
-                        severity="high",
-                        component="bundle_simulation",
-                        issue_type="simulation_failure_handling",
-                        description="Bundle simulation did not properly handle invalid bundle",
-                        impact="Invalid bundles might be executed",
-                        recommendation="Improve bundle simulation error handling"
-                    ))
-                else:
-                    logger.info("Bundle simulation handling test passed")
-                    self.test_results["bundle_simulation_handling"] = "PASS"
-            except Exception as e:
-                logger.error(f"Error testing bundle simulation handling: {e}")
-                self.issues.append(SecurityIssue(
-                    severity="medium",
-                    component="bundle_simulation",
-                    issue_type="test_failure",
-                    description=f"Bundle simulation test failed: {e}",
-                    impact="Unable to verify bundle simulation security",
-                    recommendation="Fix bundle simulation test and re-run"
-                ))
-        auditor._test_bundle_simulation_handling = patched_test_bundle_simulation_handling.__get__(auditor)
-
-        async def patched_test_risk_control_enforcement(self):
-            try:
-                logger.info("Testing risk control enforcement...")
-                from on1builder.engines.safety_guard import SafetyGuard
-                safety_guard = SafetyGuard(self.web3)
-                safety_guard.set_emergency_pause(True)
-                test_tx_params = {
-                    "to": "0x0000000000000000000000000000000000000000",
-                    "value": 0,
-                    "data": "0x",
-                    "gas": 21000,
-                    "gasPrice": 20000000000
-                }
-                is_safe, reason = await safety_guard.check_risk_controls(test_tx_params)
-                if is_safe:
-                    self.issues.append(SecurityIssue(
-                        severity="critical",
-                        component="risk_controls",
-                        issue_type="emergency_pause_bypass",
-                        description="Transaction allowed despite emergency pause being active",
-                        impact="Emergency pause can be bypassed, leading to unwanted transactions",
-                        recommendation="Fix emergency pause enforcement in risk controls"
-                    ))
-                else:
-                    logger.info("Risk control enforcement test passed")
-                    self.test_results["risk_control_enforcement"] = "PASS"
-                safety_guard.set_emergency_pause(False)
-                high_gas_tx = {"gasPrice": 200000000000}
-                is_safe, reason = await safety_guard.check_risk_controls(high_gas_tx)
-                if is_safe:
-                    self.issues.append(SecurityIssue(
-                        severity="high",
-                        component="risk_controls",
-                        issue_type="gas_ceiling_bypass",
-                        description="Transaction allowed despite exceeding gas ceiling",
-                        impact="Gas ceiling can be bypassed",
-                        recommendation="Fix gas ceiling enforcement in risk controls"
-                    ))
-                else:
-                    logger.info("Gas ceiling enforcement test passed")
-                    self.test_results["gas_ceiling_enforcement"] = "PASS"
-            except Exception as e:
-                logger.error(f"Error testing risk control enforcement: {e}")
-                self.issues.append(SecurityIssue(
-                    severity="high",
-                    component="risk_controls",
-                    issue_type="test_failure",
-                    description=f"Risk control test failed: {e}",
-                    impact="Unable to verify risk control security",
-                    recommendation="Fix risk control test and re-run"
-                ))
-        auditor._test_risk_control_enforcement = patched_test_risk_control_enforcement.__get__(auditor)
-
-        async def patched_test_flashbots_relay_security(self):
-            try:
-                logger.info("Testing Flashbots relay security...")
-                from on1builder.monitoring.flashbots_relay import FlashbotsRelay
-                flashbots_relay = FlashbotsRelay(self.web3, self.dummy_private_key)
-                # Add test logic or skip with a comment if not possible without real env
-                logger.info("Flashbots relay security test skipped (requires real environment)")
-                self.test_results["flashbots_relay_security"] = "SKIPPED"
-            except Exception as e:
-                logger.error(f"Error testing Flashbots relay security: {e}")
-                self.issues.append(SecurityIssue(
-                    severity="high",
-                    component="flashbots_relay",
-                    issue_type="test_failure",
-                    description=f"Flashbots relay test failed: {e}",
-                    impact="Unable to verify Flashbots relay security",
-                    recommendation="Fix Flashbots relay test and re-run"
-                ))
-        auditor._test_flashbots_relay_security = patched_test_flashbots_relay_security.__get__(auditor)
-
-        async def patched_test_profit_calculation_integrity(self):
-            try:
-                logger.info("Testing profit calculation integrity...")
-                from on1builder.utils.profit_optimizer import ProfitOptimizer
-                profit_optimizer = ProfitOptimizer(self.web3)
-                test_cases = [
-                    (0, 1, 0.1, 5.0, False),
-                    (1, 0, 0.1, 5.0, False),
-                    (1, 1.06, 0.01, 5.0, True),
-                    (1, 1.03, 0.01, 5.0, False),
-                    (-1, 1, 0.1, 5.0, False),
-                    (1, 1, -0.1, 5.0, False),
-                ]
-                for input_amt, output_amt, gas_cost_eth, roi_threshold_pct, expected in test_cases:
-                    try:
-                        result = profit_optimizer.is_profitable_trade(
-                            input_amt, output_amt, gas_cost_eth, roi_threshold_pct
-                        )
-                        if result != expected:
-                            self.issues.append(SecurityIssue(
-                                severity="high",
-                                component="profit_calculation",
-                                issue_type="calculation_error",
-                                description=f"Profit calculation failed for case: input={input_amt}, output={output_amt}, gas={gas_cost_eth}",
-                                impact="Incorrect profit calculations could lead to unprofitable trades",
-                                recommendation="Fix profit calculation logic for edge cases"
-                            ))
-                    except Exception as e:
-                        if input_amt <= 0 or output_amt < 0:
-                            logger.info(f"Profit calculation properly handled invalid input: {e}")
-                        else:
-                            self.issues.append(SecurityIssue(
-                                severity="medium",
-                                component="profit_calculation",
-                                issue_type="unexpected_exception",
-                                description=f"Unexpected exception in profit calculation: {e}",
-                                impact="Profit calculation failures could prevent trade execution",
-                                recommendation="Improve exception handling in profit calculation"
-                            ))
-                logger.info("Profit calculation integrity test passed")
-                self.test_results["profit_calculation_integrity"] = "PASS"
-            except Exception as e:
-                logger.error(f"Error testing profit calculation integrity: {e}")
-                self.issues.append(SecurityIssue(
-                    severity="high",
-                    component="profit_calculation",
-                    issue_type="test_failure",
-                    description=f"Profit calculation test failed: {e}",
-                    impact="Unable to verify profit calculation security",
-                    recommendation="Fix profit calculation test and re-run"
-                ))
-        auditor._test_profit_calculation_integrity = patched_test_profit_calculation_integrity.__get__(auditor)
-
-        # Now run the audit
-        await auditor._test_flashloan_atomicity()
-        await auditor._test_bundle_simulation_handling()
-        await auditor._test_risk_control_enforcement()
-        await auditor._test_flashbots_relay_security()
-        await auditor._test_profit_calculation_integrity()
-        report = auditor._generate_security_report()
-        import json
-        print(json.dumps(report, indent=2))
+        # Now run the audit; sub-tests are independent and record their own failures
+        await asyncio.gather(
+            auditor._test_flashloan_atomicity(),
+            auditor._test_bundle_simulation_handling(),
+            auditor._test_risk_control_enforcement(),
+            auditor._test_flashbots_relay_security(),
+            auditor._test_profit_calculation_integrity(),
+        )
+        print(auditor.report_json(indent=True).decode())
 
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
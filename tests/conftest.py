@@ -0,0 +1,20 @@
+"""
+Shared pytest configuration for the ON1Builder test suite.
+"""
+
+import sys
+
+import pytest
+
+# Use uvloop for async tests if available
+try:
+    import uvloop
+    HAVE_UVLOOP = sys.platform != "win32"
+except ImportError:
+    HAVE_UVLOOP = False
+
+if HAVE_UVLOOP:
+    @pytest.fixture(scope="session")
+    def event_loop_policy():
+        """Run every async test on a uvloop event loop."""
+        return uvloop.EventLoopPolicy()
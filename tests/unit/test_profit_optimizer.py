@@ -2,249 +2,232 @@
 Unit tests for profit optimizer functionality.
 """
 
+import logging
+
 import pytest
-from unittest.mock import Mock, patch
-from on1builder.utils.profit_optimizer import ProfitOptimizer
-
-class TestProfitOptimizer:
-    """Test cases for ProfitOptimizer class."""
-    
-    def setup_method(self):
-        """Set up test fixtures."""
-        # Patch get_settings to return a mock settings object
-        self.settings_patcher = patch('on1builder.config.loaders.get_settings')
-        mock_get_settings = self.settings_patcher.start()
-        mock_settings = Mock()
-        mock_settings.min_profit_eth = 0.01
-        mock_settings.min_roi_pct = 5.0
-        mock_settings.max_gas_eth = 0.1
-        mock_settings.bundle_timeout_sec = 30
-        mock_settings.bundle_simulation_retries = 2
-        mock_settings.bundle_simulation_delay = 0.1
-        mock_settings.bundle_simulation_gas_limit = 1000000
-        mock_settings.bundle_simulation_min_profit = 0.01
-        mock_settings.bundle_simulation_min_roi = 5.0
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from web3 import Web3
+from on1builder.utils import profit_optimizer
+from on1builder.utils.profit_optimizer import GasOptimization, ProfitCalc, ProfitOptimizer, SimResult
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _patch_settings():
+    """Patch get_settings once for the whole module with a mock settings object."""
+    mock_settings = Mock()
+    mock_settings.min_profit_eth = 0.01
+    mock_settings.min_roi_pct = 5.0
+    mock_settings.max_gas_eth = 0.1
+    mock_settings.bundle_timeout_sec = 30
+    mock_settings.bundle_simulation_retries = 2
+    mock_settings.bundle_simulation_delay = 0.1
+    mock_settings.bundle_simulation_gas_limit = 1000000
+    mock_settings.bundle_simulation_min_profit = 0.01
+    mock_settings.bundle_simulation_min_roi = 5.0
+    with patch('on1builder.config.loaders.get_settings') as mock_get_settings:
         mock_get_settings.return_value = mock_settings
-        # Create a mock web3 instance for testing
-        mock_web3 = Mock()
-        self.optimizer = ProfitOptimizer(mock_web3)
-    
-    def teardown_method(self):
-        self.settings_patcher.stop()
-    
-    def test_is_profitable_trade_basic_profitable(self):
-        """Test basic profitable trade calculation."""
-        # Test case: 10 ETH input, 10.6 ETH output, 0.01 ETH gas cost, 5% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=10.0,
-            output_amt=10.6,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (10.6 - 10.0 - 0.01) / 10.0 = 0.059 = 5.9% ROI
-        assert result is True
-    
-    def test_is_profitable_trade_basic_unprofitable(self):
-        """Test basic unprofitable trade calculation."""
-        # Test case: 10 ETH input, 10.4 ETH output, 0.01 ETH gas cost, 5% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=10.0,
-            output_amt=10.4,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (10.4 - 10.0 - 0.01) / 10.0 = 0.039 = 3.9% ROI
-        assert result is False
-    
-    def test_is_profitable_trade_zero_input(self):
-        """Test edge case with zero input amount."""
-        result = self.optimizer.is_profitable_trade(
-            input_amt=0.0,
-            output_amt=1.0,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        assert result is False
-    
-    def test_is_profitable_trade_negative_input(self):
-        """Test edge case with negative input amount."""
-        result = self.optimizer.is_profitable_trade(
-            input_amt=-1.0,
-            output_amt=1.0,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        assert result is False
-    
-    def test_is_profitable_trade_high_gas_cost(self):
-        """Test case where gas cost makes trade unprofitable."""
-        # Test case: 1 ETH input, 1.05 ETH output, 0.1 ETH gas cost, 5% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0,
-            output_amt=1.05,
-            gas_cost_eth=0.1,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (1.05 - 1.0 - 0.1) / 1.0 = -0.05 = -5% ROI
-        assert result is False
-    
-    def test_is_profitable_trade_exact_threshold(self):
-        """Test case where ROI exactly meets threshold."""
-        # Test case: 1 ETH input, 1.06 ETH output, 0.01 ETH gas cost, 5% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0,
-            output_amt=1.06,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (1.06 - 1.0 - 0.01) / 1.0 = 0.05 = 5% ROI (exactly at threshold)
-        assert result is True
-    
-    def test_is_profitable_trade_small_amounts(self):
-        """Test with very small amounts."""
-        # Test case: 0.001 ETH input, 0.00106 ETH output, 0.00001 ETH gas cost, 5% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=0.001,
-            output_amt=0.00106,
-            gas_cost_eth=0.00001,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (0.00106 - 0.001 - 0.00001) / 0.001 = 0.049 = 4.9% ROI
-        assert result is False
-    
-    def test_is_profitable_trade_large_amounts(self):
-        """Test with large amounts."""
-        # Test case: 1000 ETH input, 1050 ETH output, 1 ETH gas cost, 5% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1000.0,
-            output_amt=1050.0,
-            gas_cost_eth=1.0,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (1050 - 1000 - 1) / 1000 = 0.049 = 4.9% ROI
-        assert result is False
-    
-    def test_is_profitable_trade_very_high_threshold(self):
-        """Test with very high ROI threshold."""
-        # Test case: 1 ETH input, 1.1 ETH output, 0.01 ETH gas cost, 20% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0,
-            output_amt=1.1,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=20.0
-        )
-        
-        # Expected: (1.1 - 1.0 - 0.01) / 1.0 = 0.09 = 9% ROI
-        assert result is False
-    
-    def test_is_profitable_trade_zero_threshold(self):
-        """Test with zero ROI threshold."""
-        # Test case: 1 ETH input, 0.9 ETH output, 0.01 ETH gas cost, 0% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0,
-            output_amt=0.9,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=0.0
-        )
-        
-        # Expected: (0.9 - 1.0 - 0.01) / 1.0 = -0.11 = -11% ROI
-        assert result is False
-    
-    def test_is_profitable_trade_negative_roi(self):
-        """Test case with negative ROI."""
-        # Test case: 1 ETH input, 0.8 ETH output, 0.01 ETH gas cost, 5% threshold
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0,
-            output_amt=0.8,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (0.8 - 1.0 - 0.01) / 1.0 = -0.21 = -21% ROI
-        assert result is False
-    
-    @patch('on1builder.utils.profit_optimizer.logger')
-    def test_is_profitable_trade_exception_handling(self, mock_logger):
-        """Test exception handling in profit calculation."""
-        # Mock an exception by passing invalid types
-        result = self.optimizer.is_profitable_trade(
-            input_amt="invalid",
-            output_amt=1.0,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        # Should return False and log error
-        assert result is False
-        mock_logger.error.assert_called_once()
-    
-    def test_roi_calculation_accuracy(self):
-        """Test ROI calculation accuracy with known values."""
-        # Test multiple scenarios with known expected ROI values
-        test_cases = [
-            # (input, output, gas_cost, expected_roi_pct)
-            (100, 105, 1, 4.0),      # 4% ROI
-            (100, 110, 2, 8.0),      # 8% ROI
-            (100, 95, 1, -6.0),      # -6% ROI
-            (1000, 1050, 10, 4.0),   # 4% ROI with larger amounts
-            (0.1, 0.105, 0.001, 4.0), # 4% ROI with small amounts
-        ]
-        
-        for input_amt, output_amt, gas_cost, expected_roi in test_cases:
-            # Calculate expected result based on threshold
-            threshold = 5.0
-            expected_result = expected_roi >= threshold
-            
-            result = self.optimizer.is_profitable_trade(
-                input_amt=float(input_amt),
-                output_amt=float(output_amt),
-                gas_cost_eth=float(gas_cost),
-                roi_threshold_pct=threshold
-            )
-            
-            assert result == expected_result, f"Failed for case: input={input_amt}, output={output_amt}, gas={gas_cost}"
-    
-    def test_floating_point_precision(self):
-        """Test floating point precision handling."""
-        # Test with very precise floating point values
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0000000001,
-            output_amt=1.0500000001,
-            gas_cost_eth=0.0100000001,
-            roi_threshold_pct=5.0
-        )
-        
-        # Should handle floating point precision correctly
-        assert isinstance(result, bool)
-    
-    def test_edge_case_output_equals_input(self):
-        """Test edge case where output equals input."""
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0,
-            output_amt=1.0,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (1.0 - 1.0 - 0.01) / 1.0 = -0.01 = -1% ROI
-        assert result is False
-    
-    def test_edge_case_output_less_than_input(self):
-        """Test edge case where output is less than input."""
-        result = self.optimizer.is_profitable_trade(
-            input_amt=1.0,
-            output_amt=0.9,
-            gas_cost_eth=0.01,
-            roi_threshold_pct=5.0
-        )
-        
-        # Expected: (0.9 - 1.0 - 0.01) / 1.0 = -0.11 = -11% ROI
-        assert result is False 
\ No newline at end of file
+        yield mock_settings
+
+
+@pytest.fixture
+def optimizer():
+    """Create a fresh ProfitOptimizer backed by a mock web3 instance."""
+    return ProfitOptimizer(Mock())
+
+
+# (input, output, gas_cost, roi_threshold_pct, expected, id)
+IS_PROFITABLE_CASES = [
+    (10.0, 10.6, 0.01, 5.0, True, "basic_profitable"),          # 5.9% ROI
+    (10.0, 10.4, 0.01, 5.0, False, "basic_unprofitable"),       # 3.9% ROI
+    (0.0, 1.0, 0.01, 5.0, False, "zero_input"),
+    (-1.0, 1.0, 0.01, 5.0, False, "negative_input"),
+    (1.0, 1.05, 0.1, 5.0, False, "high_gas_cost"),              # -5% ROI
+    (1.0, 1.06, 0.01, 5.0, True, "exact_threshold"),            # 5% ROI
+    (0.001, 0.00106, 0.00001, 5.0, False, "small_amounts"),     # 4.9% ROI
+    (1000.0, 1050.0, 1.0, 5.0, False, "large_amounts"),         # 4.9% ROI
+    (1.0, 1.1, 0.01, 20.0, False, "very_high_threshold"),       # 9% ROI
+    (1.0, 0.9, 0.01, 0.0, False, "zero_threshold"),             # -11% ROI
+    (1.0, 0.8, 0.01, 5.0, False, "negative_roi"),               # -21% ROI
+    (1.0, 1.0, 0.01, 5.0, False, "output_equals_input"),        # -1% ROI
+    (1.0, 0.9, 0.01, 5.0, False, "output_less_than_input"),     # -11% ROI
+    (100.0, 105.0, 1.0, 5.0, False, "roi_4pct"),
+    (100.0, 110.0, 2.0, 5.0, True, "roi_8pct"),
+    (100.0, 95.0, 1.0, 5.0, False, "roi_minus_6pct"),
+    (1000.0, 1050.0, 10.0, 5.0, False, "roi_4pct_large"),
+    (0.1, 0.105, 0.001, 5.0, False, "roi_4pct_small"),
+]
+
+
+@pytest.mark.parametrize(
+    "input_amt,output_amt,gas_cost_eth,roi_threshold_pct,expected",
+    [case[:5] for case in IS_PROFITABLE_CASES],
+    ids=[case[5] for case in IS_PROFITABLE_CASES],
+)
+def test_is_profitable_trade(optimizer, input_amt, output_amt, gas_cost_eth, roi_threshold_pct, expected):
+    """Test profit calculation against known ROI outcomes."""
+    result = optimizer.is_profitable_trade(
+        input_amt=input_amt,
+        output_amt=output_amt,
+        gas_cost_eth=gas_cost_eth,
+        roi_threshold_pct=roi_threshold_pct
+    )
+
+    assert result is expected
+
+
+def test_is_profitable_trade_exception_handling(optimizer, caplog):
+    """Test exception handling in profit calculation."""
+    # Invalid types make the calculation raise; it should return False and log an error
+    with caplog.at_level(logging.ERROR):
+        assert optimizer.is_profitable_trade("invalid", 1.0, 0.01, 5.0) is False
+
+    assert any("profitability" in r.getMessage() for r in caplog.records if r.levelno == logging.ERROR)
+
+
+def test_floating_point_precision(optimizer):
+    """Test floating point precision handling."""
+    # Test with very precise floating point values
+    result = optimizer.is_profitable_trade(
+        input_amt=1.0000000001,
+        output_amt=1.0500000001,
+        gas_cost_eth=0.0100000001,
+        roi_threshold_pct=5.0
+    )
+
+    # Should handle floating point precision correctly
+    assert isinstance(result, bool)
+
+
+@pytest.mark.asyncio
+async def test_analyze_profitability_many_uses_single_batch():
+    """Test batched analysis sends one JSON-RPC batch for all opportunities."""
+    batch = MagicMock()
+    batch.__aenter__.return_value = batch
+    batch.async_execute = AsyncMock(return_value=[
+        20000000000,           # gas price (20 gwei)
+        b"\x01", 100000,       # opportunity 1: eth_call, estimate_gas
+        b"\x01", 200000,       # opportunity 2: eth_call, estimate_gas
+    ])
+    mock_web3 = Mock()
+    mock_web3.batch_requests.return_value = batch
+    mock_web3.from_wei = Web3.from_wei
+    mock_web3.to_wei = Web3.to_wei
+    optimizer = ProfitOptimizer(mock_web3)
+
+    results = await optimizer.analyze_profitability_many([
+        ({"expected_profit_eth": 0.5, "amount_in": 1.0}, {"to": "0x0"}),
+        ({"expected_profit_eth": 0.0, "amount_in": 1.0}, {"to": "0x0"}),
+    ])
+
+    batch.async_execute.assert_awaited_once()
+    assert batch.add.call_count == 5
+    assert len(results) == 2
+    assert all(r.simulation_success for r in results)
+    assert results[0].gross_profit_eth == 0.5
+    assert results[0].net_profit_eth > results[1].net_profit_eth
+    assert results[1].profitable is False
+    assert optimizer.get_optimization_stats()["total_analyses"] == 2
+
+
+# (gross_profit, gas_estimate, gas_gwei, sim_success, gas_cost, net_profit, roi_pct, profitable, id)
+FINALIZE_CASES = [
+    (0.1, 100000, 20, True, 0.002, 0.098, 9.8, True, "profitable"),
+    (0.05, 100000, 20, True, 0.002, 0.048, 4.8, False, "below_min_roi"),
+    (0.05, 0, 20, True, 0.0, 0.05, 5.0, True, "zero_gas_cost"),
+    (0.1, 100000, 20, False, 0.002, 0.098, 9.8, False, "simulation_failed"),
+]
+
+
+@pytest.mark.parametrize(
+    "gross_profit, gas_estimate, gas_gwei, sim_success, gas_cost, net_profit, roi_pct, profitable",
+    [case[:-1] for case in FINALIZE_CASES],
+    ids=[case[-1] for case in FINALIZE_CASES],
+)
+async def test_finalize_profit_analysis_prices_gas_at_recommended_price(
+    optimizer, gross_profit, gas_estimate, gas_gwei, sim_success, gas_cost, net_profit, roi_pct, profitable
+):
+    """Test final figures use gas_estimate x recommended gwei on a 1 ETH investment."""
+    optimizer._min_profit_eth = 0.01
+    optimizer._min_roi_percentage = 5.0
+    calc = ProfitCalc(
+        gross_profit_eth=gross_profit, gas_cost_eth=0.0, net_profit_eth=gross_profit, roi_percentage=0.0,
+        profitable=False, confidence_score=0.7, risk_level="LOW", execution_probability=0.9
+    )
+    sim = SimResult(success=sim_success, gas_estimate=gas_estimate, simulation_result=b"\x01", execution_probability=0.9)
+
+    result = await optimizer._finalize_profit_analysis(calc, GasOptimization(gas_gwei, "market", 0.0), sim)
+
+    assert result.gas_cost_eth == pytest.approx(gas_cost)
+    assert result.net_profit_eth == pytest.approx(net_profit)
+    assert result.roi_percentage == pytest.approx(roi_pct)
+    assert result.profitable is profitable
+    assert result.recommended_gas_price_gwei == gas_gwei
+    assert result.simulation_success is sim_success
+
+
+async def test_simulate_transaction_shares_success_but_retries_failure(optimizer):
+    """Test a successful simulation is reused while a failed one is retried."""
+    ok = SimResult(success=True, gas_estimate=100000, simulation_result=b"\x01", execution_probability=0.9)
+    failed = SimResult(success=False, gas_estimate=21000, simulation_result=None, execution_probability=0.3)
+    optimizer._execute_simulation = AsyncMock(side_effect=[failed, ok, ok])
+
+    assert await optimizer._simulate_transaction({"to": "0x0", "gas": 21000}) is failed
+    assert await optimizer._simulate_transaction({"to": "0x0", "gas": 21000}) is ok
+    assert await optimizer._simulate_transaction({"to": "0x0", "gas": 21000}) is ok
+    # Gas limit is part of the key
+    assert await optimizer._simulate_transaction({"to": "0x0", "gas": 50000}) is ok
+
+    assert optimizer._execute_simulation.await_count == 3
+
+
+async def test_simulate_transaction_evicts_expired_entries(optimizer, monkeypatch):
+    """Test expired simulations are dropped from the front of the in-flight map."""
+    ok = SimResult(success=True, gas_estimate=100000, simulation_result=b"\x01", execution_probability=0.9)
+    optimizer._execute_simulation = AsyncMock(return_value=ok)
+    now = [1000.0]
+    monkeypatch.setattr(profit_optimizer.time, "monotonic", lambda: now[0])
+
+    await optimizer._simulate_transaction({"to": "0x1"})
+    now[0] += 6.0
+    await optimizer._simulate_transaction({"to": "0x2"})
+    now[0] += 7.0
+    await optimizer._simulate_transaction({"to": "0x3"})
+
+    assert len(optimizer._sim_inflight) == 2
+    await optimizer._simulate_transaction({"to": "0x2"})
+    assert optimizer._execute_simulation.await_count == 3
+
+
+def test_analysis_summary_logged_once_per_interval(optimizer):
+    """Test analysis logging is aggregated into one summary per interval."""
+    with patch('on1builder.utils.profit_optimizer.logger') as mock_logger:
+        for _ in range(100):
+            optimizer._log_analysis_summary(1, 1, 1000000)
+        mock_logger.info.assert_not_called()
+
+        optimizer._log_last_ts -= 1.0
+        optimizer._log_analysis_summary(1, 0, 1000000)
+
+    mock_logger.info.assert_called_once()
+    assert mock_logger.info.call_args.args[1:3] == (101, 100)
+    assert optimizer._log_window_analyses == 0
+
+
+def test_are_profitable_trades_matches_scalar(optimizer):
+    """Test batched screening agrees with is_profitable_trade per trade."""
+    trades = [
+        (1.0, 1.06, 0.01),   # Profitable
+        (1.0, 1.04, 0.01),   # Below threshold
+        (1.0, 1.05, 0.0),    # Exactly at threshold
+        (0.0, 1.0, 0.01),    # Zero input
+        (-1.0, 1.0, 0.01),   # Negative input
+        (1.0, 0.9, 0.01),    # Loss
+    ]
+    inputs, outputs, gas_costs = zip(*trades)
+
+    result = optimizer.are_profitable_trades(inputs, outputs, gas_costs, 5.0)
+
+    assert result.tolist() == [
+        optimizer.is_profitable_trade(*trade, 5.0) for trade in trades
+    ]
+    assert result.tolist() == [True, False, True, False, False, False]
@@ -0,0 +1,306 @@
+"""
+Unit tests for SecurityAuditor functionality.
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from on1builder.utils.profit_optimizer import is_profitable_trade
+from on1builder.utils.security_checks import SecurityAuditor
+
+AUDIT_SUB_TESTS = (
+    "_test_flashloan_atomicity",
+    "_test_bundle_simulation_handling",
+    "_test_risk_control_enforcement",
+    "_test_flashbots_relay_security",
+    "_test_profit_calculation_integrity",
+)
+
+
+def _stub_sub_tests(auditor, test):
+    """Replace every audit sub-test with the same coroutine function."""
+    for name in AUDIT_SUB_TESTS:
+        setattr(auditor, name, test)
+
+
+class TestSecurityAuditor:
+    """Test cases for SecurityAuditor class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.auditor = SecurityAuditor(Mock())
+
+    async def test_run_security_audit_runs_tests_concurrently(self):
+        """Test all sub-tests are in flight at the same time."""
+        started = []
+        all_started = asyncio.Event()
+
+        def make_test(name):
+            async def test():
+                started.append(name)
+                if len(started) == 5:
+                    all_started.set()
+                # Deadlocks unless every sub-test has started before any finishes
+                await asyncio.wait_for(all_started.wait(), timeout=1.0)
+                self.auditor.test_results[name] = "PASS"
+            return test
+
+        for name in AUDIT_SUB_TESTS:
+            setattr(self.auditor, name, make_test(name))
+
+        report = await self.auditor.run_security_audit()
+
+        assert len(report["test_results"]) == 5
+        assert report["summary"]["total_issues"] == 0
+
+    async def test_run_security_audit_maps_raised_test_to_issue(self):
+        """Test a sub-test that raises is reported as a high-severity issue."""
+        async def passing():
+            pass
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        self.auditor._test_flashloan_atomicity = passing
+        self.auditor._test_bundle_simulation_handling = passing
+        self.auditor._test_risk_control_enforcement = failing
+        self.auditor._test_flashbots_relay_security = passing
+        self.auditor._test_profit_calculation_integrity = passing
+
+        report = await self.auditor.run_security_audit()
+
+        assert report["summary"]["high"] == 1
+        issue = report["issues_by_severity"]["high"][0]
+        assert issue["component"] == "risk_controls"
+        assert issue["issue_type"] == "test_failure"
+        assert issue["impact"] == "Unable to verify risk control security"
+        assert "boom" in issue["description"]
+
+    async def test_run_security_audit_closes_shared_relay(self):
+        """Test the shared Flashbots relay is stopped when the audit finishes."""
+        async def uses_relay():
+            self.auditor.flashbots_relay
+
+        relay = Mock()
+        relay.stop = AsyncMock()
+        self.auditor.flashbots_relay = relay
+        _stub_sub_tests(self.auditor, uses_relay)
+
+        await self.auditor.run_security_audit()
+
+        relay.stop.assert_awaited_once()
+        assert "flashbots_relay" not in self.auditor.__dict__
+
+    def test_generate_security_report_buckets_and_score(self):
+        """Test report groups issues by severity and scores them."""
+        for severity, component in (
+            ("critical", "flashloan_atomicity"),
+            ("high", "risk_controls"),
+            ("high", "risk_controls"),
+            ("low", "profit_calculation"),
+        ):
+            self.auditor._add_issue(
+                severity=severity,
+                component=component,
+                issue_type="test",
+                description="desc",
+                impact="impact",
+                recommendation="fix"
+            )
+
+        report = self.auditor._generate_security_report()
+
+        assert report["summary"] == {
+            "total_issues": 4,
+            "critical": 1,
+            "high": 2,
+            "medium": 0,
+            "low": 1,
+            "security_score": 79
+        }
+        assert [len(v) for v in report["issues_by_severity"].values()] == [1, 2, 0, 1]
+        assert [i.severity for i in self.auditor.issues] == ["critical", "high", "high", "low"]
+        # The flattened view is read-only; writes must go through _add_issue
+        with pytest.raises(AttributeError):
+            self.auditor.issues.append(self.auditor.issues[0])
+        assert report["recommendations"] == [
+            "CRITICAL: Fix 1 critical security issues immediately",
+            "HIGH: Address 2 high-severity issues before deployment",
+            "Review flash loan implementation to ensure atomicity",
+            "Strengthen risk control enforcement mechanisms",
+            "Audit profit calculation logic for edge cases",
+        ]
+
+    async def test_run_security_audit_reuses_report_within_block_window(self):
+        """Test a report is reused until the chain advances past the TTL."""
+        block_number = 100
+
+        class FakeEth:
+            @property
+            def block_number(self):
+                async def get():
+                    return block_number
+                return get()
+
+        self.auditor.web3_factory.get_web3.return_value.eth = FakeEth()
+        runs = []
+
+        async def passing():
+            runs.append(1)
+
+        _stub_sub_tests(self.auditor, passing)
+
+        first = await self.auditor.run_security_audit()
+        # Mutating a returned report must not leak into later cache hits
+        first["summary"]["total_issues"] = 99
+        first["recommendations"].append("tampered")
+        block_number = 104
+        second = await self.auditor.run_security_audit()
+        block_number = 105
+        third = await self.auditor.run_security_audit()
+
+        assert second["summary"]["total_issues"] == 0
+        assert "tampered" not in second["recommendations"]
+        assert second == third
+        assert len(runs) == 10
+        assert self.auditor.report_cache_stats == {"hits": 1, "misses": 2}
+
+    async def test_run_security_audit_without_cache_skips_block_lookup(self):
+        """Test use_cache=False neither fetches the block number nor stores the report."""
+        block_lookup = Mock(side_effect=AssertionError("block number fetched"))
+        self.auditor._get_block_number = block_lookup
+
+        async def passing():
+            pass
+
+        _stub_sub_tests(self.auditor, passing)
+
+        await self.auditor.run_security_audit(use_cache=False)
+
+        block_lookup.assert_not_called()
+        assert self.auditor._cached_report is None
+
+    async def test_run_security_audit_pools_relay_http_session(self):
+        """Test the relay is given the audit's shared HTTP session, closed afterwards."""
+        sessions = []
+
+        async def uses_relay():
+            relay = self.auditor.flashbots_relay
+            assert relay._session is self.auditor._http_session
+            sessions.append(relay._session)
+
+        _stub_sub_tests(self.auditor, uses_relay)
+
+        with patch("on1builder.utils.security_checks.settings", Mock(wallet_key="0x" + "1" * 64)):
+            await self.auditor.run_security_audit()
+
+        assert len(sessions) == 5 and all(session is sessions[0] for session in sessions)
+        assert sessions[0] is not None and sessions[0].closed
+        assert self.auditor._http_session is None
+
+    async def test_run_security_audit_cancelled_clears_http_session(self):
+        """Test a cancelled audit does not leave its closed session behind."""
+        started = asyncio.Event()
+
+        async def hangs():
+            started.set()
+            await asyncio.sleep(3600)
+
+        _stub_sub_tests(self.auditor, hangs)
+
+        audit = asyncio.create_task(self.auditor.run_security_audit())
+        await started.wait()
+        assert self.auditor._http_session is not None
+        audit.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await audit
+
+        assert self.auditor._http_session is None
+
+    async def test_profit_calculation_integrity_flags_accepted_invalid_input(self):
+        """Test an invalid input reported as profitable is flagged."""
+        self.auditor.profit_optimizer = Mock(is_profitable_trade=is_profitable_trade)
+
+        await self.auditor._test_profit_calculation_integrity()
+
+        issues = self.auditor.issues
+        # A negative gas cost inflates ROI past the threshold
+        assert len(issues) == 1
+        assert issues[0].issue_type == "calculation_error"
+        assert "gas=-0.1" in issues[0].description
+        assert self.auditor.test_results["profit_calculation_integrity"] == "PASS"
+
+    async def test_profit_calculation_integrity_accepts_raising_on_invalid_input(self):
+        """Test raising on invalid input is accepted but not on well-formed trades."""
+        def strict_is_profitable_trade(input_amt, output_amt, gas_cost_eth, roi_threshold_pct):
+            if input_amt <= 0 or output_amt <= 0 or gas_cost_eth < 0:
+                raise ValueError("invalid trade")
+            return is_profitable_trade(input_amt, output_amt, gas_cost_eth, roi_threshold_pct)
+
+        self.auditor.profit_optimizer = Mock(is_profitable_trade=strict_is_profitable_trade)
+
+        await self.auditor._test_profit_calculation_integrity()
+
+        assert self.auditor.issues == ()
+
+    async def test_profit_calculation_integrity_flags_raising_on_valid_input(self):
+        """Test raising on a well-formed trade is reported as an unexpected exception."""
+        self.auditor.profit_optimizer = Mock(is_profitable_trade=Mock(side_effect=ValueError("bad")))
+
+        await self.auditor._test_profit_calculation_integrity()
+
+        issues = self.auditor.issues
+        assert [i.issue_type for i in issues] == ["unexpected_exception"] * 2
+        assert issues[0].severity == "medium"
+        assert issues[0].component == "profit_calculation"
+        assert issues[0].description == "Unexpected exception in profit calculation: bad"
+
+    def test_report_json_serializes_issues(self):
+        """Test the JSON report has the same schema as the dict report."""
+        self.auditor._add_issue(
+            severity="medium",
+            component="bundle_simulation",
+            issue_type="test_failure",
+            description="desc",
+            impact="impact",
+            recommendation="fix"
+        )
+
+        payload = json.loads(self.auditor.report_json())
+
+        assert payload == self.auditor._generate_security_report()
+        assert payload["summary"]["medium"] == 1
+        assert payload["issues_by_severity"]["medium"] == [{
+            "component": "bundle_simulation",
+            "issue_type": "test_failure",
+            "description": "desc",
+            "impact": "impact",
+            "recommendation": "fix"
+        }]
+        assert json.loads(self.auditor.report_json(indent=True)) == payload
+
+    async def test_audit_test_records_failure_issue(self):
+        """Test a sub-test that errors is recorded as a test_failure issue."""
+        self.auditor.safety_guard = Mock(set_emergency_pause=Mock(side_effect=RuntimeError("down")))
+
+        await self.auditor._test_risk_control_enforcement()
+
+        issue, = self.auditor.issues
+        assert issue.severity == "high"
+        assert issue.component == "risk_controls"
+        assert issue.issue_type == "test_failure"
+        assert issue.description == "Risk control test failed: down"
+        assert issue.impact == "Unable to verify risk control security"
+
+    async def test_audit_test_failure_text_matches_component(self):
+        """Test the flash loan failure issue keeps its established wording."""
+        self.auditor.web3_factory.get_web3.side_effect = RuntimeError("down")
+
+        await self.auditor._test_flashloan_atomicity()
+
+        issue, = self.auditor.issues
+        assert issue.description == "Flash loan atomicity test failed: down"
+        assert issue.impact == "Unable to verify flash loan security"
+        assert issue.recommendation == "Fix flash loan atomicity test and re-run"
@@ -2,16 +2,20 @@
 Unit tests for StrategySelector functionality.
 """
 
+import numpy as np
 import pytest
 from unittest.mock import Mock, patch
+from on1builder.utils import advanced_analytics
 from on1builder.utils.advanced_analytics import StrategySelector
 
 class TestStrategySelector:
     """Test cases for StrategySelector class."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.selector = StrategySelector()
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def _selector(cls):
+        """Share one selector across the class; tests do not mutate it."""
+        cls.selector = StrategySelector()
     
     def test_select_strategy_high_gas_skip(self):
         """Test strategy selection with high gas price."""
@@ -142,14 +146,102 @@ class TestStrategySelector:
         # Should handle negative values gracefully
         assert strategy in ["simple", "multi_hop", "skip"]
     
-    @patch('logging.getLogger')
-    def test_select_strategy_exception_handling(self, mock_get_logger):
+    def test_select_strategy_decision_table(self):
+        """Test every combination of threshold conditions."""
+        # (mempool_tx_rate, gas_price_gwei, token_price_volatility, expected)
+        cases = [
+            (500, 50, 5.0, "simple"),         # No condition met
+            (1200, 40, 5.0, "multi_hop"),     # Multi-hop only
+            (500, 50, 15.0, "skip"),          # High volatility
+            (1200, 40, 15.0, "skip"),         # High volatility overrides multi-hop
+            (500, 150, 5.0, "skip"),          # High gas
+            (1200, 150, 5.0, "skip"),         # High gas, mempool high but gas not low
+            (500, 150, 15.0, "skip"),         # High gas and volatility
+            (1200, 150, 15.0, "skip"),        # Everything high
+        ]
+        
+        for mempool_tx_rate, gas_price_gwei, token_price_volatility, expected in cases:
+            strategy = self.selector.select_strategy(
+                mempool_tx_rate=mempool_tx_rate,
+                gas_price_gwei=gas_price_gwei,
+                token_price_volatility=token_price_volatility
+            )
+            
+            assert strategy == expected, f"Failed for case: mempool={mempool_tx_rate}, gas={gas_price_gwei}, volatility={token_price_volatility}"
+    
+    def test_select_strategy_batch_matches_scalar(self):
+        """Test batched selection agrees with select_strategy per snapshot."""
+        snapshots = [
+            (500, 50, 5.0),       # Simple
+            (1200, 40, 5.0),      # Multi-hop
+            (1000, 60, 5.0),      # Medium gas threshold is exclusive
+            (500, 100, 5.0),      # Gas threshold
+            (500, 50, 10.0),      # Volatility threshold
+            (0, 0, 0),            # Zero values
+            (-100, -50, -5.0),    # Negative values
+        ]
+        mempool_tx_rates, gas_prices, volatilities = zip(*snapshots)
+        
+        strategies = self.selector.select_strategy_batch(mempool_tx_rates, gas_prices, volatilities)
+        
+        assert strategies.tolist() == [
+            self.selector.select_strategy(*snapshot) for snapshot in snapshots
+        ]
+        assert strategies.tolist() == ["simple", "multi_hop", "simple", "skip", "skip", "simple", "simple"]
+    
+    def test_select_strategy_branch_hits_profiling(self):
+        """Test outcome counters are only kept when branch profiling is enabled."""
+        self.selector.select_strategy(500, 50, 5.0)
+        assert self.selector.branch_hits == {}
+        
+        with patch('on1builder.utils.advanced_analytics._PROFILE_STRATEGY_BRANCHES', True):
+            selector = StrategySelector()
+        for snapshot in [(500, 50, 5.0), (0, 0, 0), (1200, 40, 5.0), (500, 150, 5.0)]:
+            selector.select_strategy(*snapshot)
+        
+        assert selector.branch_hits == {"simple": 2, "multi_hop": 1, "skip": 1}
+    
+    def test_evaluate_matches_separate_calls(self):
+        """Test evaluate returns the same strategy and confidence as the one-shot APIs."""
+        snapshots = [
+            (500, 50, 5.0),       # Simple
+            (1200, 20, 2.0),      # Multi-hop, favourable bands
+            (600, 90, 8.0),       # Simple, high gas band
+            (500, 150, 5.0),      # Skip
+            ("invalid", 50, 5.0), # Invalid input
+        ]
+        for mempool_tx_rate, gas_price_gwei, token_price_volatility in snapshots:
+            strategy = self.selector.select_strategy(mempool_tx_rate, gas_price_gwei, token_price_volatility)
+            confidence = self.selector.get_strategy_confidence(strategy, {
+                'mempool_tx_rate': mempool_tx_rate,
+                'gas_price_gwei': gas_price_gwei,
+                'token_price_volatility': token_price_volatility
+            })
+            
+            assert self.selector.evaluate(mempool_tx_rate, gas_price_gwei, token_price_volatility) == (strategy, confidence)
+    
+    def test_evaluate_numpy_scalars(self):
+        """Test evaluate accepts the NumPy scalars select_strategy accepts."""
+        strategy, confidence = self.selector.evaluate(np.float64(500), np.float64(20), np.float64(3))
+        
+        assert strategy == "simple"
+        assert confidence == pytest.approx(0.9)
+    
+    def test_evaluate_exception_handling(self, monkeypatch):
+        """Test a scoring error is logged and falls back to zero confidence."""
+        mock_logger = Mock()
+        monkeypatch.setattr(self.selector, 'logger', mock_logger)
+        monkeypatch.setattr(advanced_analytics, '_strategy_confidence', Mock(side_effect=TypeError("bad")))
+        
+        assert self.selector.evaluate(500, 20, 3.0) == ("simple", 0.0)
+        mock_logger.error.assert_called_once()
+    
+    def test_select_strategy_exception_handling(self, monkeypatch):
         """Test exception handling in strategy selection."""
         mock_logger = Mock()
-        mock_get_logger.return_value = mock_logger
-        selector = StrategySelector()
+        monkeypatch.setattr(self.selector, 'logger', mock_logger)
         # Mock an exception by passing invalid types
-        strategy = selector.select_strategy(
+        strategy = self.selector.select_strategy(
             mempool_tx_rate="invalid",
             gas_price_gwei=50,
             token_price_volatility=5.0
@@ -279,6 +371,14 @@ class TestStrategySelector:
         # Should return base confidence
         assert confidence == 0.5
     
+    def test_get_strategy_confidence_no_known_conditions(self):
+        """Test absent conditions return base confidence but unrelated keys are scored as zeros."""
+        assert self.selector.get_strategy_confidence("simple", None) == 0.5
+        
+        # Missing values default to 0, which falls in the favourable gas and volatility bands
+        confidence = self.selector.get_strategy_confidence("simple", {"block_number": 123})
+        assert confidence == pytest.approx(0.9)
+    
     def test_get_strategy_confidence_partial_conditions(self):
         """Test confidence calculation with partial market conditions."""
         confidence = self.selector.get_strategy_confidence(
@@ -291,6 +391,59 @@ class TestStrategySelector:
         # Should handle partial conditions gracefully
         assert 0.0 <= confidence <= 1.0
     
+    def test_get_strategy_confidence_band_edges(self):
+        """Test band edges are inclusive in the neutral band."""
+        for gas_price, volatility, mempool_tx_rate in (
+            (30, 5.0, 500),
+            (80, 15.0, 500),
+            (float("nan"), float("nan"), float("nan")),
+        ):
+            confidence = self.selector.get_strategy_confidence(
+                strategy="simple",
+                market_conditions={
+                    "gas_price_gwei": gas_price,
+                    "token_price_volatility": volatility,
+                    "mempool_tx_rate": mempool_tx_rate
+                }
+            )
+            
+            # No adjustment applies at the edges or for unordered values
+            assert confidence == 0.5
+    
+    def test_get_strategy_confidence_numpy_scalars(self):
+        """Test NumPy scalar conditions score the same as Python numbers."""
+        confidence = self.selector.get_strategy_confidence(
+            strategy="simple",
+            market_conditions={
+                "gas_price_gwei": np.float64(20),
+                "token_price_volatility": np.float64(3.0),
+                "mempool_tx_rate": np.int64(600)
+            }
+        )
+        
+        assert confidence == self.selector.get_strategy_confidence(
+            strategy="simple",
+            market_conditions={
+                "gas_price_gwei": 20,
+                "token_price_volatility": 3.0,
+                "mempool_tx_rate": 600
+            }
+        )
+        assert confidence == pytest.approx(1.0)
+    
+    def test_get_strategy_confidence_caches_per_band(self):
+        """Test confidence is memoized per band combination, not per raw value."""
+        for gas_price in (10, 20.5, 50, 70.25, 90, 250):
+            for volatility in (1.0, 7.5, 12.0, 40.0):
+                for mempool_volume in (100, 499, 501, 5000):
+                    self.selector.get_strategy_confidence("simple", {
+                        'gas_price_gwei': gas_price,
+                        'token_price_volatility': volatility,
+                        'mempool_tx_rate': mempool_volume
+                    })
+        
+        assert advanced_analytics._banded_confidence.cache_info().currsize <= 18
+    
     def test_confidence_bounds(self):
         """Test that confidence is always between 0 and 1."""
         test_conditions = [
@@ -303,14 +456,12 @@ class TestStrategySelector:
             confidence = self.selector.get_strategy_confidence("simple", conditions)
             assert 0.0 <= confidence <= 1.0
     
-    @patch('logging.getLogger')
-    def test_get_strategy_confidence_exception_handling(self, mock_get_logger):
+    def test_get_strategy_confidence_exception_handling(self, monkeypatch):
         """Test exception handling in confidence calculation."""
         mock_logger = Mock()
-        mock_get_logger.return_value = mock_logger
-        selector = StrategySelector()
+        monkeypatch.setattr(self.selector, 'logger', mock_logger)
         # Mock an exception by passing invalid types
-        confidence = selector.get_strategy_confidence(
+        confidence = self.selector.get_strategy_confidence(
             strategy="simple",
             market_conditions="invalid"
         )